@@ -1,13 +1,17 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import json
+import math
 import os
+import queue
 import socket
-import struct
+import threading
 import time
 from decimal import Decimal, getcontext
 from screeninfo import get_monitors
 from pythonosc.osc_message_builder import OscMessageBuilder
+from meters import MeterDecoder, is_blob
+from meter_history import MeterHistory
 
 CONFIG_FILE = "config.json"
 X32_IP = "192.168.3.110"
@@ -15,7 +19,22 @@ X32_PORT = 10023
 LOCAL_PORT = 10025
 SUBSCRIPTION_NAME = "mtrs"
 METERS_PATH = "/meters/1"
-COLLECTION_DURATION = 3
+COLLECTION_DURATION = 10  # upper bound per phase; usually stops early
+MIN_COLLECTION_SEC = 1.5
+# A phase ends once every channel's percentile estimate moves less than
+# CONVERGE_TOLERANCE (relative) for CONVERGE_CHECKS checks in a row
+CONVERGE_CHECK_SEC = 0.5
+CONVERGE_TOLERANCE = 0.02
+CONVERGE_CHECKS = 3
+LEVEL_FLOOR_DB = -120  # bottom of the live level bars
+# Thresholds sit between the loudest mics-off and quietest mics-on readings,
+# taken as percentiles so a single spike or dropout doesn't skew them
+NOISE_PERCENTILE = 99
+SIGNAL_PERCENTILE = 1
+# Frames held for one calibration phase, with room for fast meter rates
+CALIBRATION_HISTORY_DEPTH = COLLECTION_DURATION * 100
+# A running SUNDAY's history file is used if its newest frame is this recent
+SHARED_HISTORY_MAX_AGE = 2.0
 getcontext().prec = 12
 
 # Load config or use defaults
@@ -33,6 +52,12 @@ def load_config():
             "METERS_PATH": "/meters/1",
             "RENEW_INTERVAL": 9,
             "POLL_SEC": 0.05,
+            "MUTE_MODE": "poll",
+            "RECONCILE_SEC": 5.0,
+            "FLASH_INTERVAL": 0.5,
+            "SCRIBBLE_RECONCILE_SEC": 10.0,
+            "METER_SUBSCRIBE": "batch",
+            "METER_TIME_FACTOR": 0,
             "OBS_HOST": "LBC-AV1.local",
             "OBS_PORT": 4455,
             "OBS_PASSWORD": "161616",
@@ -59,6 +84,10 @@ def load_config():
                 "15": 0.0000200554,
                 "16": 0.0000227090
             },
+            "HYSTERESIS": {},
+            "LEVEL_HOLD_SEC": 0.15,
+            "METER_HISTORY_DEPTH": 1200,
+            "METER_HISTORY_PATH": "",
             "DISPLAY_INDEX": 1
         }
 
@@ -69,6 +98,17 @@ def save_config(cfg):
     root.destroy()
 
 config = load_config()
+# Keys added after older config.json files were written
+config.setdefault("MUTE_MODE", "poll")
+config.setdefault("RECONCILE_SEC", 5.0)
+config.setdefault("FLASH_INTERVAL", 0.5)
+config.setdefault("SCRIBBLE_RECONCILE_SEC", 10.0)
+config.setdefault("METER_SUBSCRIBE", "batch")
+config.setdefault("METER_TIME_FACTOR", 0)
+config.setdefault("HYSTERESIS", {})
+config.setdefault("LEVEL_HOLD_SEC", 0.15)
+config.setdefault("METER_HISTORY_DEPTH", 1200)
+config.setdefault("METER_HISTORY_PATH", "")
 
 monitor = get_monitors()[0]
 root = tk.Tk()
@@ -102,8 +142,16 @@ for key, label in [
     ("OBS_PASSWORD", "OBS Password"),
     ("METERS_PATH", "Meter Path"),
     ("SUBSCRIPTION_NAME", "Subscription Name"),
+    ("METER_SUBSCRIBE", "Meter Subscription (batch/format)"),
+    ("METER_TIME_FACTOR", "Meter Time Factor"),
     ("RENEW_INTERVAL", "Renew Interval (sec)"),
     ("POLL_SEC", "Poll Interval (sec)"),
+    ("MUTE_MODE", "Mute Updates (poll/xremote)"),
+    ("RECONCILE_SEC", "Reconcile Interval with xremote (sec)"),
+    ("FLASH_INTERVAL", "Flash Interval (sec)"),
+    ("SCRIBBLE_RECONCILE_SEC", "Scribble Color Check Interval (sec)"),
+    ("METER_HISTORY_DEPTH", "Meter History Depth (frames, 0 = off)"),
+    ("METER_HISTORY_PATH", "Meter History File (blank = memory only)"),
     ("DISPLAY_INDEX", "Display Index")
 ]:
     add_field(main_frame, label, key)
@@ -114,6 +162,8 @@ ttkn.pack(anchor='w', pady=(10, 10))
 
 threshold_vars = {}
 threshold_checks = {}
+hysteresis_vars = {}
+level_bars = {}
 
 tt_thresh_scroll = tk.Canvas(thresh_frame)
 thresh_scrollbar = ttk.Scrollbar(thresh_frame, orient="vertical", command=tt_thresh_scroll.yview)
@@ -131,6 +181,8 @@ def toggle_all():
     for var in threshold_checks.values():
         var.set(select_all_var.get())
 
+add_field(thresh_container, "Level Hold Time (sec)", "LEVEL_HOLD_SEC")
+ttk.Label(thresh_container, text="Hysteresis: fraction above the threshold a channel must reach to count as on again (blank = 0.1)").pack(anchor='w', pady=(5, 5))
 ttk.Checkbutton(thresh_container, text="Select All", variable=select_all_var, command=toggle_all).pack(anchor='w')
 
 for k, v in config["THRESHOLDS"].items():
@@ -144,6 +196,13 @@ for k, v in config["THRESHOLDS"].items():
     threshold_vars[k] = var
     entry = ttk.Entry(frame, textvariable=var, width=20)
     entry.pack(side='left', fill='x', expand=True)
+    hyst_var = tk.StringVar(value=str(config["HYSTERESIS"].get(k, "")))
+    hysteresis_vars[k] = hyst_var
+    ttk.Label(frame, text="Hyst").pack(side='left', padx=(5, 2))
+    ttk.Entry(frame, textvariable=hyst_var, width=6).pack(side='left')
+    bar = ttk.Progressbar(frame, length=160, maximum=100)
+    bar.pack(side='left', padx=5)
+    level_bars[k] = bar
 
 def send_osc_message(sock, address, types, args):
     builder = OscMessageBuilder(address=address)
@@ -151,65 +210,198 @@ def send_osc_message(sock, address, types, args):
         builder.add_arg(a, t)
     sock.sendto(builder.build().dgram, (X32_IP, X32_PORT))
 
-def parse_x32_meter_blob(data):
-    header_length = 12
-    blob = data[header_length:]
-    num_values = struct.unpack('<I', blob[4:8])[0]
-    float_data = blob[8:]
-    values = struct.unpack('<' + 'f' * num_values, float_data[:num_values * 4])
-    return [float(Decimal(str(v)).quantize(Decimal('0.0000000001'))) for v in values]
-
-def collect_levels(state, selected_channels):
+# Calibration runs on a worker thread. Levels are read from a running SUNDAY's
+# meter history file when there is a fresh one, otherwise from one subscription
+# of our own for both phases; either way they land in a MeterHistory. It hands
+# results and prompts to the Tk thread through calibration_events and the
+# newest meter values through live_levels.
+calibration_events = queue.SimpleQueue()
+proceed = threading.Event()
+live_levels = {}
+
+class MeterReceiver:
+    def __init__(self, sock, decoder):
+        self.sock = sock
+        self.decoder = decoder
+        self.channels = decoder.channels
+        self.history = MeterHistory(decoder.channels, CALIBRATION_HISTORY_DEPTH)
+        self.renew_interval = float(config.get("RENEW_INTERVAL", 9))
+        self.renew_at = time.monotonic() + self.renew_interval
+
+    def receive(self):
+        # Stores at most one packet; returns within the socket timeout
+        global live_levels
+        if time.monotonic() >= self.renew_at:
+            send_osc_message(self.sock, '/renew', 's', [SUBSCRIPTION_NAME])
+            self.renew_at = time.monotonic() + self.renew_interval
+        try:
+            data, _ = self.sock.recvfrom(4096)
+        except socket.timeout:
+            return
+        if not is_blob(data):
+            return
+        values = self.decoder.decode(data)
+        self.history.append(values)
+        live_levels = dict(zip(self.channels, values))
+
+    def close(self):
+        self.history.close()
+        self.sock.close()
+
+class SharedHistory:
+    # Follows the history file SUNDAY is writing; no socket of our own
+    def __init__(self, history, channels):
+        self.history = history
+        self.channels = tuple(sorted(channels))
+
+    def receive(self):
+        global live_levels
+        time.sleep(0.05)
+        latest = self.history.latest()
+        if latest is not None:
+            levels = dict(zip(self.history.channels, latest[1]))
+            live_levels = {ch: levels[ch] for ch in self.channels}
+
+    def close(self):
+        self.history.close()
+
+def open_shared_history(selected_channels):
+    path = config.get("METER_HISTORY_PATH")
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        history = MeterHistory.load(path)
+    except (OSError, ValueError) as e:
+        print(f"[History] Ignoring {path}: {e}")
+        return None
+    latest = history.latest()
+    if (latest is None or time.time() - latest[0] > SHARED_HISTORY_MAX_AGE
+            or not set(selected_channels) <= set(history.channels)):
+        history.close()
+        return None
+    print(f"[History] Reading levels from {path}")
+    return SharedHistory(history, selected_channels)
+
+def open_receiver(selected_channels):
     sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
-    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-    sock.bind(('', LOCAL_PORT))
-    send_osc_message(sock, '/batchsubscribe', 'ssiii', [SUBSCRIPTION_NAME, METERS_PATH, 0, 0, 0])
-    buffer = {ch: [] for ch in selected_channels}
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('', LOCAL_PORT))
+        sock.settimeout(0.1)
+        send_osc_message(sock, '/batchsubscribe', 'ssiii', [SUBSCRIPTION_NAME, METERS_PATH, 0, 0, 0])
+    except OSError:
+        sock.close()
+        raise
+    return MeterReceiver(sock, MeterDecoder(selected_channels))
+
+def converged(previous, current):
+    return all(
+        abs(a - b) <= CONVERGE_TOLERANCE * max(abs(a), abs(b))
+        for a, b in zip(previous, current)
+    )
+
+def collect_levels(receiver, state):
+    percentile = NOISE_PERCENTILE if state == "off" else SIGNAL_PERCENTILE
     print(f"Collecting values with mics {state}...")
 
-    end_time = time.time() + COLLECTION_DURATION
-    sock.settimeout(0.5)
-
-    while time.time() < end_time:
-        try:
-            data, _ = sock.recvfrom(4096)
-            if len(data) > 225:
-                values = parse_x32_meter_blob(data)
-                for ch in selected_channels:
-                    if ch - 1 < len(values):
-                        buffer[ch].append(values[ch - 1])
-        except socket.timeout:
+    # History stamps are wall-clock time
+    start = time.time()
+    next_check = start + MIN_COLLECTION_SEC
+    previous = None
+    steady = 0
+    while True:
+        now = time.time()
+        if now - start >= COLLECTION_DURATION:
+            break
+        receiver.receive()
+        if now < next_check:
             continue
-
-    sock.close()
-    return {
-        ch: max(buffer[ch]) if state == "off" else min(buffer[ch]) if buffer[ch] else 0.0
-        for ch in selected_channels
-    }
-
-def generate_thresholds(mins, maxs):
+        next_check = now + CONVERGE_CHECK_SEC
+        calibration_events.put(("progress", state, now - start))
+        stats = receiver.history.level_stats(receiver.channels, since=start)
+        if not all(s.count for s in stats.stats):
+            continue
+        estimate = [s.percentile(percentile) for s in stats.stats]
+        steady = steady + 1 if previous and converged(previous, estimate) else 0
+        previous = estimate
+        if steady >= CONVERGE_CHECKS:
+            print(f"Estimates converged after {now - start:.1f}s")
+            break
+
+    stats = receiver.history.level_stats(receiver.channels, since=start)
+    for ch, s in stats.items():
+        print(f"  Ch {ch}: n={s.count} min={s.min:.10f} max={s.max:.10f} "
+              f"mean={s.mean:.10f} sd={s.stddev:.10f}")
+    return stats
+
+def generate_thresholds(on_stats, off_stats):
     thresholds = {}
-    for ch in mins:
-        low = Decimal(str(min(mins[ch], maxs[ch])))
-        high = Decimal(str(max(mins[ch], maxs[ch])))
+    for ch in on_stats.channels:
+        signal = on_stats[ch].percentile(SIGNAL_PERCENTILE)
+        noise = off_stats[ch].percentile(NOISE_PERCENTILE)
+        low = Decimal(str(min(signal, noise)))
+        high = Decimal(str(max(signal, noise)))
         mid = low + (high - low) / 2
         thresholds[str(ch)] = float(mid.quantize(Decimal('0.0000000001')))
     return thresholds
 
+def calibrate(selected_channels):
+    receiver = None
+    try:
+        receiver = open_shared_history(selected_channels) or open_receiver(selected_channels)
+        results = {}
+        for state in ("off", "on"):
+            proceed.clear()
+            calibration_events.put(("prompt", state))
+            while not proceed.is_set():
+                receiver.receive()  # keeps the live bars moving while the user gets ready
+            results[state] = collect_levels(receiver, state)
+        calibration_events.put(("done", generate_thresholds(results["on"], results["off"])))
+    except Exception as e:
+        calibration_events.put(("error", str(e)))
+    finally:
+        if receiver is not None:
+            receiver.close()
+
+def level_percent(value):
+    db = 20 * math.log10(value) if value > 0 else LEVEL_FLOOR_DB
+    return max(0.0, min(100.0, (db - LEVEL_FLOOR_DB) / -LEVEL_FLOOR_DB * 100))
+
+def poll_calibration():
+    # Rescheduled first: the prompts below run a nested event loop
+    root.after(100, poll_calibration)
+    for ch, value in live_levels.items():
+        level_bars[str(ch)]["value"] = level_percent(value)
+    while True:
+        try:
+            event = calibration_events.get_nowait()
+        except queue.Empty:
+            return
+        if event[0] == "progress":
+            calibration_status.set(f"Capturing with mics {event[1]}... {event[2]:.1f}s")
+        elif event[0] == "prompt":
+            if event[1] == "off":
+                messagebox.showinfo("Step 1", "Unplug/turn off all microphones, then click OK to begin max level capture.")
+            else:
+                messagebox.showinfo("Step 2", "Plug in/turn on all microphones, then click OK to begin min level capture.")
+            proceed.set()
+        elif event[0] == "done":
+            for ch, val in event[1].items():
+                config["THRESHOLDS"][ch] = val
+                threshold_vars[ch].set(str(val))
+            save_config(config)
+        elif event[0] == "error":
+            messagebox.showerror("Calibration Failed", event[1])
+            calibration_status.set("")
+            set_thresholds_button.state(["!disabled"])
+
 def set_thresholds():
     selected_channels = [int(k) for k, v in threshold_checks.items() if v.get()]
     if not selected_channels:
         messagebox.showwarning("No Channels Selected", "Please select at least one channel.")
         return
-    messagebox.showinfo("Step 1", "Unplug/turn off all microphones, then click OK to begin max level capture.")
-    max_levels = collect_levels("off", selected_channels)
-    messagebox.showinfo("Step 2", "Plug in/turn on all microphones, then click OK to begin min level capture.")
-    min_levels = collect_levels("on", selected_channels)
-    thresholds = generate_thresholds(min_levels, max_levels)
-    for ch, val in thresholds.items():
-        config["THRESHOLDS"][ch] = val
-        threshold_vars[ch].set(str(val))
-    save_config(config)
+    set_thresholds_button.state(["disabled"])
+    threading.Thread(target=calibrate, args=(selected_channels,), name="calibration", daemon=True).start()
 
 # Buttons
 btn_frame = ttk.Frame(root)
@@ -217,16 +409,23 @@ btn_frame.pack(pady=10)
 
 ttk.Button(btn_frame, text="Save Configuration", command=lambda: on_save()).pack(side="left", padx=5)
 
-ttk.Button(thresh_container, text="Set Thresholds", command=set_thresholds).pack(anchor='w', pady=10)
+set_thresholds_button = ttk.Button(thresh_container, text="Set Thresholds", command=set_thresholds)
+set_thresholds_button.pack(anchor='w', pady=10)
+calibration_status = tk.StringVar()
+ttk.Label(thresh_container, textvariable=calibration_status).pack(anchor='w')
 
 def on_save():
     for key, var in entries.items():
         val = var.get()
         try:
-            if key in ["X32_PORT", "LOCAL_PORT", "OBS_PORT", "DISPLAY_INDEX"]:
+            if key in ["X32_PORT", "LOCAL_PORT", "OBS_PORT", "DISPLAY_INDEX", "METER_TIME_FACTOR", "METER_HISTORY_DEPTH"]:
                 config[key] = int(val)
-            elif key in ["RENEW_INTERVAL", "POLL_SEC"]:
+            elif key in ["RENEW_INTERVAL", "POLL_SEC", "RECONCILE_SEC", "FLASH_INTERVAL", "SCRIBBLE_RECONCILE_SEC", "LEVEL_HOLD_SEC"]:
                 config[key] = float(val)
+            elif key == "MUTE_MODE" and val not in ["poll", "xremote"]:
+                raise ValueError(val)
+            elif key == "METER_SUBSCRIBE" and val not in ["batch", "format"]:
+                raise ValueError(val)
             else:
                 config[key] = val
         except ValueError:
@@ -241,7 +440,20 @@ def on_save():
             messagebox.showerror("Invalid Threshold", f"Channel {k}: invalid float value")
             return
 
+    hysteresis = {}
+    for k, var in hysteresis_vars.items():
+        val = var.get().strip()
+        if not val:
+            continue
+        try:
+            hysteresis[k] = float(val)
+        except ValueError:
+            messagebox.showerror("Invalid Hysteresis", f"Channel {k}: invalid float value")
+            return
+    config["HYSTERESIS"] = hysteresis
+
     config["FULLSCREEN_MODE"] = fullscreen_var.get()
     save_config(config)
 
+root.after(100, poll_calibration)
 root.mainloop()
\ No newline at end of file
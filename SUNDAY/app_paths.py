@@ -0,0 +1,8 @@
+import os
+
+
+def cache_dir(*parts):
+    # Per-user cache, outside the app folder so publish.py never packages it
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME") \
+        or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "SUNDAY", *parts)
@@ -0,0 +1,499 @@
+import asyncio
+import threading
+import time
+from pythonosc.osc_packet import OscPacket
+from meters import MeterDecoder, is_blob
+from osc_sender import OscSender
+from osc_replies import ReplyDispatcher
+from routing import Routing
+from osc_engine import OscEngine
+from obs_client import ObsStreamWatcher
+from osc_log import OscRecorder, replay
+from metrics import Metrics
+from state import StateStore
+from level_detect import LevelDetector, DEFAULT_HOLD_SEC
+from meter_history import MeterHistory
+
+PHANTOM_ADDRESS = "/headamp/037/phantom"
+OVERSIZED_DATAGRAM = 1472  # more than fits in one Ethernet frame
+
+
+def resolve_state(indicator):
+    muted = not indicator.on
+    low = indicator.low
+    if muted and low:
+        return 'flashoff'
+    elif not muted and low:
+        return 'flashon'
+    elif not muted and not low:
+        return 'on'
+    else:
+        return 'off'
+
+
+class Console:
+    # The X32/OBS automation: meters, mutes, scribble flashing, DCA8 and the
+    # startup probe. Needs no display. A UI subscribes by setting
+    # engine.wake before start(); it then receives ("frame",) when
+    # store.current changes and ("status", ...) events on engine.events.
+    def __init__(self, config, record_path=None, replay_path=None, replay_speed=1.0):
+        self.x32_ip = config["X32_IP"]
+        self.x32_port = config["X32_PORT"]
+        self.local_port = config["LOCAL_PORT"]
+        self.subscription_name = config["SUBSCRIPTION_NAME"]
+        self.meters_path = config["METERS_PATH"]
+        self.renew_interval = config["RENEW_INTERVAL"]
+        self.poll_sec = config["POLL_SEC"]
+        self.thresholds = {int(k): v for k, v in config["THRESHOLDS"].items()}
+        # "poll": query every mute at POLL_SEC. "xremote": console pushes changes,
+        # with a full reconciliation poll every RECONCILE_SEC.
+        self.mute_mode = config.get("MUTE_MODE", "poll")
+        self.reconcile_sec = config.get("RECONCILE_SEC", 5.0)
+        self.flash_interval = config.get("FLASH_INTERVAL", 0.5)
+        # How often scribble colors are read back to catch lost or overridden writes
+        self.scribble_reconcile_sec = config.get("SCRIBBLE_RECONCILE_SEC", 10.0)
+        # "batch": whole /meters/1 bank. "format": /formatsubscribe for just the
+        # threshold channels. The time factor slows the console's meter pushes.
+        self.meter_subscribe = config.get("METER_SUBSCRIBE", "batch")
+        self.meter_time_factor = int(config.get("METER_TIME_FACTOR", 0))
+        # Timing/counters: an HTTP /metrics endpoint and/or a periodic log line; 0 = off
+        self.metrics_port = int(config.get("METRICS_PORT", 0))
+        self.metrics_log_sec = float(config.get("METRICS_LOG_SEC", 0))
+        # Frames of meter values kept per channel (0 = none); with a path they
+        # go to a memory-mapped file that outlives a crash
+        self.meter_history_depth = int(config.get("METER_HISTORY_DEPTH", 1200))
+        self.meter_history_path = config.get("METER_HISTORY_PATH", "")
+        self.replay_path = replay_path
+        self.replay_speed = replay_speed
+        # Replays judge hold times by the recording's clock so results don't depend on speed
+        self.replay_time = 0.0
+        self.clock = self.replay_clock if replay_path else time.monotonic
+
+        if self.meter_subscribe == "format":
+            self.meter_decoder = MeterDecoder(self.thresholds, base=min(self.thresholds))
+        else:
+            self.meter_decoder = MeterDecoder(self.thresholds)
+        self.routes = routes = Routing(self.thresholds, config["GROUP_CHANNELS"],
+                                       config["INDIVIDUAL_CHANNELS"], config["DCAS"])
+        self.choir, self.handheld, self.instrumental = (
+            routes.group('Choir'), routes.group('Handheld'), routes.group('Instrumental'))
+        self.mic6, self.mic7, self.mic8 = routes.individual(6), routes.individual(7), routes.individual(8)
+        self.level_detector = LevelDetector(
+            routes.level_routes,
+            {int(k): float(v) for k, v in config.get("HYSTERESIS", {}).items()},
+            float(config.get("LEVEL_HOLD_SEC", DEFAULT_HOLD_SEC)),
+        )
+        self.osc = OscSender(self.x32_ip, self.x32_port, coalesce=config.get("OSC_BUNDLE_SCRIBBLES", True))
+        self.recorder = OscRecorder(record_path) if record_path and not replay_path else None
+        self.history = self.open_history()
+        self.metrics = Metrics() if self.metrics_port or self.metrics_log_sec else None
+        self.poll_dgrams = ([self.build_poll(ch) for ch in routes.polled_channels] +
+                            [self.build_dca_poll(dca) for dca in routes.dcas])
+
+        self.status = "STARTING"
+        self.panel_states = ('off',) * 8
+        self.store = StateStore(self.panel_states)
+        self.flashing_scribbles = {}
+        self.original_colors = {}
+        self.last_sent_colors = {}  # what each scribble strip shows, as far as we know
+        self.color_queries = {}  # newest color query future per channel
+        self.restored_scribbles = set()  # restore written, not yet confirmed by a reply
+        self.flash_tick = 0
+        self.flashon_state = self.flashoff_state = True
+        self.obs_streaming = None  # unknown until OBS reports or while it's unreachable; DCA8 is left alone then
+        self.finished = threading.Event()  # set when a replay runs out
+
+        if self.metrics is not None:
+            self.instrument()
+        self.engine = OscEngine(self.local_port, self.on_datagram)
+        # Queries go out on the engine's socket so the console answers on LOCAL_PORT
+        self.replies = ReplyDispatcher(self.send_query)
+        # obsws is blocking and calls back on its own thread; hop onto the engine
+        self.obs_watcher = ObsStreamWatcher(config["OBS_HOST"], config["OBS_PORT"], config["OBS_PASSWORD"],
+                                            lambda streaming: self.engine.call(self.on_obs_streaming, streaming))
+
+    # --- Lifecycle (any thread) ---
+    def start(self):
+        self.engine.start(self.replay_main if self.replay_path else self.osc_main)
+
+    def stop(self):
+        print("\n[Shutdown] Restoring scribble strip colors...")
+        self.obs_watcher.stop()
+        self.engine.stop()
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.history is not None:
+            self.history.close()
+        self.restore_all_scribbles()
+
+    def open_history(self):
+        if self.meter_history_depth <= 0:
+            return None
+        channels = self.meter_decoder.channels
+        # A replay must not overwrite the live service's history file
+        path = None if self.replay_path else self.meter_history_path or None
+        try:
+            return MeterHistory(channels, self.meter_history_depth, path)
+        except (OSError, ValueError) as e:
+            print(f"[History] Can't map {path}: {e}; keeping it in memory")
+            return MeterHistory(channels, self.meter_history_depth)
+
+    def update_status(self, new_status):
+        self.status = new_status
+        print(f"[Status] {new_status}")
+        self.engine.post("status", new_status)
+
+    # --- Console Link ---
+    def send_to_console(self, dgram):
+        # Engine thread only; other threads use engine.call(send_to_console, dgram)
+        if self.engine.transport is not None:
+            self.osc.send(dgram, self.engine.transport)
+
+    def send_query(self, dgram):
+        # Straight out on the engine thread, so a query made in update_scribbles
+        # reaches the console ahead of the flash write batched after it
+        if self.engine.in_loop():
+            self.send_to_console(dgram)
+        else:
+            self.engine.call(self.send_to_console, dgram)
+
+    def send_osc_message(self, sock, address, types, args):
+        self.osc.send(self.osc.message(address, types, args), sock)
+
+    # --- Scribble Strip Control ---
+    def send_scribble_color(self, ch, color_id):
+        if self.replay_path or self.last_sent_colors.get(ch) == color_id:
+            return
+        self.last_sent_colors[ch] = color_id
+        self.osc.send(self.osc.scribble_color(ch, color_id))
+
+    def query_scribble_color(self, ch):
+        addr = f"/ch/{ch:02}/config/color"
+        future = self.replies.query(addr, self.osc.message(addr))
+        if self.color_queries.get(ch) is not future:
+            # A repeat while one is outstanding shares it; judged by when it was sent
+            self.color_queries[ch] = future
+            was_flashing = ch in self.flashing_scribbles
+            future.add_done_callback(lambda f: self.remember_scribble_color(ch, f, was_flashing))
+        return future
+
+    def remember_scribble_color(self, ch, future, was_flashing):
+        error = future.exception()
+        if error is not None:
+            print(f"[Scribble] Ch {ch}: {error}")
+            return
+        if not future.result():
+            return
+        actual = int(future.result()[0])
+        if not was_flashing:
+            if ch in self.restored_scribbles:
+                orig = self.original_colors[ch]
+                if actual == orig ^ 0b1000:
+                    # The restore write was lost; the strip still shows the flash twin
+                    self.last_sent_colors.pop(ch, None)
+                    self.send_scribble_color(ch, orig)
+                    return
+                self.restored_scribbles.discard(ch)
+            # Sent before any flash write, so this is the strip's own color.
+            # A strip that was already flashing keeps no original rather than ours.
+            self.original_colors[ch] = actual
+            if ch not in self.flashing_scribbles:
+                self.last_sent_colors[ch] = actual
+        elif actual != self.last_sent_colors.get(ch):
+            # A flash write was lost or overridden; the next tick resends it
+            self.last_sent_colors.pop(ch, None)
+
+    def query_all_scribble_colors(self):
+        # Skip flashing channels: the console is showing our flash color there
+        return [self.query_scribble_color(ch) for ch in self.thresholds if ch not in self.flashing_scribbles]
+
+    def reconcile_scribbles(self):
+        for ch, _ in self.routes.scribble_routes:
+            self.query_scribble_color(ch)
+
+    def update_scribbles(self, flashon_state, flashoff_state):
+        ch_low = self.routes.ch_low
+        flashing_scribbles = self.flashing_scribbles
+        original_colors = self.original_colors
+        with self.osc.batch():
+            for ch, indicator in self.routes.scribble_routes:
+                low = ch_low[ch]
+                muted = not indicator.on
+
+                if low and ch not in flashing_scribbles:
+                    self.restored_scribbles.discard(ch)
+                    if ch not in original_colors:
+                        self.query_scribble_color(ch)
+                    flashing_scribbles[ch] = True
+                elif not low and ch in flashing_scribbles:
+                    orig = original_colors.get(ch)
+                    if orig is not None:
+                        self.send_scribble_color(ch, orig)
+                        self.restored_scribbles.add(ch)
+                    flashing_scribbles.pop(ch, None)
+
+                if low:
+                    base = original_colors.get(ch, 0)
+                    twin = base ^ 0b1000
+                    phase = flashoff_state if muted else flashon_state
+                    self.send_scribble_color(ch, base if phase else twin)
+
+    def restore_all_scribbles(self):
+        with self.osc.batch():
+            for ch, orig in list(self.original_colors.items()):
+                self.send_scribble_color(ch, orig)
+
+    # --- Flash Clock (engine thread) ---
+    def flash_step(self):
+        self.flash_tick += 1
+        self.flashon_state = self.flash_tick % 2 == 0
+        self.flashoff_state = (self.flash_tick // 2) % 2 == 0
+        self.update_scribbles(self.flashon_state, self.flashoff_state)
+        self.publish_frame()
+
+    def publish_frame(self):
+        # Wake the UI only when the new snapshot would draw differently
+        panel_states = self.panel_states
+        dca_override = self.routes.dca_muted[6]
+        if not dca_override and ('flashon' in panel_states or 'flashoff' in panel_states):
+            flashon, flashoff = self.flashon_state, self.flashoff_state
+        else:
+            flashon = flashoff = True
+        if self.store.publish(panel_states, flashon, flashoff, dca_override) is not None:
+            self.engine.post("frame")
+
+    # --- Console State (engine thread) ---
+    def evaluate_levels(self, levels):
+        # Returns True when any channel's low state changed
+        detector = self.level_detector
+        if not detector.update(levels, self.clock()):
+            return False
+        ch_low = self.routes.ch_low
+        for ch, low in zip(detector.channels, detector.low):
+            ch_low[ch] = low
+        for indicator in self.routes.indicators:
+            indicator.low = any([ch_low[ch] for ch in indicator.channels])
+        return True
+
+    def update_booleans(self):
+        ch_muted = self.routes.ch_muted
+        for indicator in self.routes.indicators:
+            unmuted = [not ch_muted[ch] for ch in indicator.channels]
+            indicator.on = any(unmuted) if indicator.any_on else all(unmuted)
+
+    def update_states(self):
+        dca_muted = self.routes.dca_muted
+        self.panel_states = (
+            resolve_state(self.choir),
+            resolve_state(self.handheld),
+            resolve_state(self.instrumental),
+            'off' if dca_muted[8] else 'on',
+            'flashon' if dca_muted[7] else 'off',
+            resolve_state(self.mic7),
+            resolve_state(self.mic6),
+            resolve_state(self.mic8),
+        )
+        self.publish_frame()
+
+    def handle_incoming(self, data):
+        packet = OscPacket(data)
+        updated = False
+        for raw in packet.messages:
+            msg = getattr(raw, 'message', raw)
+            route = self.routes.mute_addresses.get(msg.address)
+            if route is not None:
+                muted_array, index = route
+                muted_array[index] = (msg.params[0] == 0.0)
+                updated = True
+            else:
+                self.replies.resolve(msg.address, msg.params)
+        if updated:
+            self.update_booleans()
+            self.update_states()
+
+    def build_poll(self, ch):
+        return self.osc.message(f"/ch/{ch:02}/mix/on")
+
+    def build_dca_poll(self, dca):
+        return self.osc.message(f"/dca/{dca}/on")
+
+    def poll_mutes(self):
+        for dgram in self.poll_dgrams:
+            self.send_to_console(dgram)
+
+    def on_datagram(self, data):
+        if self.recorder is not None:
+            self.recorder.record(data)
+        if is_blob(data):
+            levels = self.meter_decoder.decode(data)
+            if self.history is not None:
+                self.history.append(levels)
+            if self.evaluate_levels(levels):
+                self.update_states()
+        else:
+            self.handle_incoming(data)
+
+    # --- Session ---
+    def phantom_power(self, sock, state):
+        value = 1 if state == 'on' else 0
+        self.osc.send(self.osc.int_message(PHANTOM_ADDRESS, value), sock)
+        print(f"[Phantom] Set to {state.upper()} on {PHANTOM_ADDRESS}")
+
+    async def verify_flash(self):
+        for attempt in range(3):
+            await asyncio.sleep(5.5)
+            mic7_state = self.store.current.states[5]
+            if mic7_state in ['flashon', 'flashoff']:
+                print(f"[Startup Check] Flash state detected: {mic7_state}")
+                return True
+            print(f"[Startup Check] Attempt {attempt + 1}: Verifying flash trigger...")
+        print("[Startup Check] Verification failed.")
+        return False
+
+    def start_subscription(self, sock):
+        if self.meter_subscribe == "format":
+            first, last = self.meter_decoder.channels[0], self.meter_decoder.channels[-1]
+            self.send_osc_message(sock, '/formatsubscribe', 'ssiii',
+                                  [self.subscription_name, self.meters_path, first, last, self.meter_time_factor])
+        else:
+            self.send_osc_message(sock, '/batchsubscribe', 'ssiii',
+                                  [self.subscription_name, self.meters_path, 0, 0, self.meter_time_factor])
+        if self.mute_mode == "xremote":
+            self.send_osc_message(sock, '/xremote', '', [])
+
+    def renew(self):
+        self.send_osc_message(self.engine.transport, '/renew', 's', [self.subscription_name])
+        if self.mute_mode == "xremote":
+            # /xremote lapses after 10 s, same as meter subscriptions
+            self.send_osc_message(self.engine.transport, '/xremote', '', [])
+        print("[OSC] Sent /renew")
+
+    # --- OBS Streaming Control ---
+    def on_obs_streaming(self, streaming):
+        print(f"[OBS Monitor] Streaming status: {streaming}")
+        self.obs_streaming = streaming
+        self.enforce_dca8()
+
+    def enforce_dca8(self):
+        # Also runs every second so a manual DCA8 change is put back
+        if self.obs_streaming is None:
+            return
+        desired_mute = not self.obs_streaming
+        current_mute = self.routes.dca_muted[8]
+        if current_mute != desired_mute:
+            print(f"[OBS Monitor] Desired mute: {desired_mute}, Current mute: {current_mute}")
+            print(f"[OBS Monitor] Sending OSC to {'unmute' if self.obs_streaming else 'mute'} DCA8")
+            self.send_osc_message(self.engine.transport, "/dca/8/on", 'i', [1 if self.obs_streaming else 0])
+
+            # Force internal and visual update
+            self.routes.dca_muted[8] = desired_mute
+            self.update_booleans()
+            self.update_states()
+
+            # Force a poll to X32 to make sure mute sticks
+            self.send_to_console(self.build_dca_poll(8))
+
+    # --- Instrumentation ---
+    def instrument(self):
+        # Rebinding the hot methods to timed wrappers keeps the disabled path untouched
+        metrics = self.metrics
+        self.meter_decoder.decode = metrics.timed("decode", self.meter_decoder.decode)
+        self.evaluate_levels = metrics.timed("evaluate_levels", self.evaluate_levels)
+        self.update_states = metrics.timed("update_states", self.update_states)
+        self.handle_incoming = metrics.timed("handle_incoming", self.handle_incoming)
+        self.update_scribbles = metrics.timed("scribbles", self.update_scribbles)
+        self.osc.send = metrics.timed("osc_send", self.osc.send)
+        process = metrics.timed("datagram", self.on_datagram)
+        # Observed by a UI on its own thread; created here so /metrics never
+        # sees the dicts grow mid-iteration
+        metrics.histogram("frame_delivery")
+        for name in ("datagrams", "oversized", "dropped"):
+            metrics.inc(name, 0)
+
+        def on_datagram(data):
+            metrics.inc("datagrams")
+            if len(data) > OVERSIZED_DATAGRAM:
+                metrics.inc("oversized")
+            try:
+                process(data)
+            except Exception:
+                metrics.inc("dropped")
+                raise
+        self.on_datagram = on_datagram
+
+    def log_metrics(self):
+        print(self.metrics.log_line())
+
+    def start_metrics(self):
+        # Engine thread
+        if self.metrics_port:
+            try:
+                self.metrics.serve(self.metrics_port)
+            except OSError as e:
+                print(f"[Metrics] Could not listen on port {self.metrics_port}: {e}")
+        if self.metrics_log_sec:
+            self.engine.every(self.metrics_log_sec, self.log_metrics)
+
+    # --- Main OSC session ---
+    async def osc_main(self):
+        engine = self.engine
+        engine.every(self.flash_interval, self.flash_step)
+        if self.metrics is not None:
+            self.start_metrics()
+        if self.recorder is not None:
+            engine.every(1, self.recorder.flush)
+        obs_started = False
+        while True:
+            try:
+                transport = await engine.open()
+            except OSError:
+                print("[OSC] Port in use. Retrying...")
+                await asyncio.sleep(1)
+                continue
+
+            session = [
+                engine.every(self.reconcile_sec if self.mute_mode == "xremote" else self.poll_sec,
+                             self.poll_mutes),
+                engine.every(self.renew_interval, self.renew),
+                engine.every(self.scribble_reconcile_sec, self.reconcile_scribbles),
+            ]
+            self.poll_mutes()
+            self.start_subscription(transport)
+            self.query_all_scribble_colors()
+            if not obs_started:
+                self.obs_watcher.start()
+                engine.every(1, self.enforce_dca8)
+                obs_started = True
+
+            self.phantom_power(transport, 'off')
+            self.update_status("PROBING")
+            if await self.verify_flash():
+                self.phantom_power(transport, 'on')
+                self.update_status("READY")
+                break
+            else:
+                self.phantom_power(transport, 'on')
+                for task in session:
+                    task.cancel()
+                engine.close_transport()
+                print("[OSC] Restarting OSC communication...")
+                await asyncio.sleep(2)
+        self.start_subscription(transport)
+
+    def replay_clock(self):
+        return self.replay_time
+
+    def replay_datagram(self, stamp, data):
+        self.replay_time = stamp
+        self.on_datagram(data)
+
+    async def replay_main(self):
+        # Offline: no socket, the recording stands in for the console
+        self.engine.every(self.flash_interval, self.flash_step)
+        if self.metrics is not None:
+            self.start_metrics()
+        self.update_status("REPLAY")
+        count, elapsed = await replay(self.replay_path, self.replay_datagram, self.replay_speed)
+        print(f"[Replay] {count} datagrams in {elapsed:.2f}s ({count / max(elapsed, 1e-9):.0f}/s)")
+        self.update_status("REPLAY DONE")
+        self.finished.set()
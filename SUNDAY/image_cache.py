@@ -0,0 +1,72 @@
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image
+from app_paths import cache_dir as app_cache_dir
+
+
+def default_cache_dir():
+    return app_cache_dir("images")
+
+
+def file_hash(path):
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def scaled_image(path, width, height, fit=False, cache_dir=None):
+    # Returns a PIL image scaled to width x height (fit=True keeps the aspect
+    # ratio within that box). Results are cached by source hash and target
+    # size, so a changed PNG or monitor geometry simply misses the cache.
+    if not os.path.exists(path):
+        print(f"Missing image: {path}")
+        return None
+    cache_dir = cache_dir or default_cache_dir()
+    stem = os.path.splitext(os.path.basename(path))[0].replace(' ', '_')
+    cached = os.path.join(
+        cache_dir, f"{stem}-{file_hash(path)[:16]}-{width}x{height}-{'fit' if fit else 'fill'}.png"
+    )
+    if os.path.exists(cached):
+        try:
+            img = Image.open(cached)
+            img.load()
+            return img
+        except OSError:
+            pass  # damaged entry, rebuild below
+
+    img = Image.open(path)
+    if fit:
+        img.thumbnail((width, height), Image.LANCZOS)
+    else:
+        img = img.resize((width, height), Image.LANCZOS)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp = f"{cached}.{os.getpid()}.tmp"
+        img.save(tmp, format="PNG", compress_level=1)
+        os.replace(tmp, cached)
+        prune(cache_dir, stem, keep=cached)
+    except OSError as e:
+        print(f"[Image Cache] Could not write {cached}: {e}")
+    return img
+
+
+def prune(cache_dir, stem, keep):
+    # Drop entries for older versions or sizes of the same source image
+    prefix = f"{stem}-"
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        if name.startswith(prefix) and name.endswith(".png") and path != keep:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def load_scaled_images(jobs, cache_dir=None):
+    # jobs: [(path, width, height), ...] -> PIL images in the same order.
+    # Decoding and resampling release the GIL, so a small pool helps on cold start.
+    with ThreadPoolExecutor(max_workers=min(8, len(jobs) or 1)) as pool:
+        return list(pool.map(lambda job: scaled_image(*job, cache_dir=cache_dir), jobs))
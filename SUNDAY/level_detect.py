@@ -0,0 +1,39 @@
+DEFAULT_HYSTERESIS = 0.1  # fraction above the threshold a low channel must climb to recover
+DEFAULT_HOLD_SEC = 0.15
+
+
+class LevelDetector:
+    # Low/not-low per channel with a hysteresis band and a hold time: a channel
+    # goes low at or below its threshold, recovers only above
+    # threshold * (1 + hysteresis), and either change must persist for
+    # hold_sec before it is taken. One pass over flat lists per packet.
+    def __init__(self, level_routes, hysteresis=None, hold_sec=DEFAULT_HOLD_SEC):
+        hysteresis = hysteresis or {}
+        self.channels = tuple(ch for ch, _ in level_routes)
+        self.enter = [threshold for _, threshold in level_routes]
+        self.leave = [threshold * (1 + hysteresis.get(ch, DEFAULT_HYSTERESIS)) for ch, threshold in level_routes]
+        self.hold_sec = hold_sec
+        self.low = [False] * len(self.channels)
+        self._since = [None] * len(self.channels)
+
+    def update(self, levels, now):
+        # Returns True when any channel changed state
+        changed = False
+        low, since, enter, leave, hold = self.low, self._since, self.enter, self.leave, self.hold_sec
+        for i, val in enumerate(levels):
+            was_low = low[i]
+            is_low = val <= (leave[i] if was_low else enter[i])
+            if is_low == was_low:
+                since[i] = None
+                continue
+            started = since[i]
+            if started is None:
+                if hold > 0:
+                    since[i] = now
+                    continue
+            elif now - started < hold:
+                continue
+            low[i] = is_low
+            since[i] = None
+            changed = True
+        return changed
@@ -0,0 +1,85 @@
+import math
+from array import array
+
+# Log-spaced histogram over the X32's linear meter range
+HIST_MIN = 1e-9
+HIST_MAX = 1.0
+BINS_PER_DECADE = 80
+NUM_BINS = int(round(math.log10(HIST_MAX / HIST_MIN) * BINS_PER_DECADE))
+_LOG_MIN = math.log10(HIST_MIN)
+
+
+class ChannelStats:
+    # Constant-memory summary of one channel's meter values: count, min/max,
+    # mean/variance (Welford) and a log histogram for percentiles.
+    __slots__ = ('count', 'mean', '_m2', 'min', 'max', 'below', 'bins')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+        self.below = 0  # values under HIST_MIN, including silence
+        self.bins = array('I', bytes(4 * NUM_BINS))
+
+    def add(self, value):
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (value - self.mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        if value < HIST_MIN:
+            self.below += 1
+        else:
+            index = int((math.log10(value) - _LOG_MIN) * BINS_PER_DECADE)
+            self.bins[min(index, NUM_BINS - 1)] += 1
+
+    @property
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stddev(self):
+        return math.sqrt(self.variance)
+
+    def percentile(self, p):
+        # Interpolated in log space within the bin; exact at 0 and 100
+        if not self.count:
+            return 0.0
+        if p <= 0:
+            return self.min
+        if p >= 100:
+            return self.max
+        rank = p / 100 * self.count
+        seen = self.below
+        if rank <= seen:
+            return max(self.min, 0.0)
+        for index, n in enumerate(self.bins):
+            if n and seen + n >= rank:
+                fraction = (rank - seen) / n
+                value = 10 ** (_LOG_MIN + (index + fraction) / BINS_PER_DECADE)
+                return min(max(value, self.min), self.max)
+            seen += n
+        return self.max
+
+
+class LevelStats:
+    # One ChannelStats per channel, fed with MeterDecoder.decode() tuples
+    def __init__(self, channels):
+        self.channels = tuple(channels)
+        self.stats = [ChannelStats() for _ in self.channels]
+        self._index = {ch: i for i, ch in enumerate(self.channels)}
+
+    def add(self, values):
+        for stats, value in zip(self.stats, values):
+            stats.add(value)
+
+    def __getitem__(self, ch):
+        return self.stats[self._index[ch]]
+
+    def items(self):
+        return zip(self.channels, self.stats)
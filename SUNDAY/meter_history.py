@@ -0,0 +1,137 @@
+import mmap
+import os
+import struct
+import time
+from array import array
+from level_stats import LevelStats
+
+# The last `depth` meter frames for a fixed set of channels. Layout, in memory
+# or in a file: HEADER <magic><channel count><depth><frames written>, the
+# channel numbers as uint32, then float64 wall-clock stamps[depth] and float32
+# values[depth][channels]. Frame n lives in slot n % depth. With a path the
+# buffer is a memory-mapped file, so the newest frames survive a crash and
+# another process (Settings) can read them while SUNDAY writes.
+MAGIC = b"SUNDAYMH"
+HEADER = struct.Struct('<8sIIQ')
+COUNT = struct.Struct('<Q')
+COUNT_OFFSET = 16
+
+
+def layout(num_channels, depth):
+    # (offset of the stamps, offset of the values, total size), 8-byte aligned
+    stamps = HEADER.size + (4 * num_channels + 7) // 8 * 8
+    values = stamps + 8 * depth
+    return stamps, values, values + (4 * num_channels * depth + 7) // 8 * 8
+
+
+class MeterHistory:
+    def __init__(self, channels, depth, path=None, _buffer=None):
+        self.channels = tuple(channels)
+        self.depth = depth
+        self.path = path
+        n = len(self.channels)
+        stamps_at, values_at, size = layout(n, depth)
+        self._file = None
+        if _buffer is not None:
+            buf = _buffer
+        elif path:
+            buf = self._map(path, size)
+        else:
+            buf = bytearray(size)
+        if bytes(buf[:8]) != MAGIC:
+            HEADER.pack_into(buf, 0, MAGIC, n, depth, 0)
+            struct.pack_into(f'<{n}I', buf, HEADER.size, *self.channels)
+        self._buf = buf
+        self._view = memoryview(buf)
+        self.stamps = self._view[stamps_at:values_at].cast('d')
+        self.values = self._view[values_at:values_at + 4 * n * depth].cast('f')
+        self._index = {ch: i for i, ch in enumerate(self.channels)}
+
+    def _map(self, path, size):
+        # Reuses a file written for the same channels and depth, so frames from
+        # before a restart stay readable; anything else is started over
+        n = len(self.channels)
+        expected = HEADER.pack(MAGIC, n, self.depth, 0)[:16] + struct.pack(f'<{n}I', *self.channels)
+        reuse = False
+        if os.path.exists(path) and os.path.getsize(path) == size:
+            with open(path, 'rb') as f:
+                head = f.read(HEADER.size + 4 * n)
+            reuse = head[:16] + head[HEADER.size:] == expected
+        self._file = open(path, 'r+b' if reuse else 'w+b')
+        if not reuse:
+            self._file.truncate(size)
+        return mmap.mmap(self._file.fileno(), size)
+
+    @classmethod
+    def load(cls, path):
+        # Read-only view of a history file, e.g. after a crash or from Settings
+        with open(path, 'rb') as f:
+            magic, n, depth, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a meter history")
+            channels = struct.unpack(f'<{n}I', f.read(4 * n))
+            buf = mmap.mmap(f.fileno(), layout(n, depth)[2], access=mmap.ACCESS_READ)
+        return cls(channels, depth, path, _buffer=buf)
+
+    @property
+    def count(self):
+        # Frames written since the buffer was created
+        return COUNT.unpack_from(self._buf, COUNT_OFFSET)[0]
+
+    def __len__(self):
+        return min(self.count, self.depth)
+
+    def append(self, values, stamp=None):
+        # Engine thread; values in the order of self.channels
+        count = self.count
+        n = len(self.channels)
+        slot = count % self.depth
+        self.values[slot * n:(slot + 1) * n] = array('f', values)
+        self.stamps[slot] = time.time() if stamp is None else stamp
+        COUNT.pack_into(self._buf, COUNT_OFFSET, count + 1)
+
+    def frames(self, since=None):
+        # (stamp, values) oldest first, only those stamped after since. The
+        # oldest slot is skipped when full: a live writer may be overwriting it.
+        count = self.count
+        n = len(self.channels)
+        first = max(0, count - self.depth + 1)
+        stamps, values = self.stamps, self.values
+        result = []
+        for i in range(first, count):
+            slot = i % self.depth
+            stamp = stamps[slot]
+            if since is not None and stamp <= since:
+                continue
+            result.append((stamp, tuple(values[slot * n:(slot + 1) * n].tolist())))
+        return result
+
+    def latest(self):
+        # (stamp, values) of the newest frame, or None before the first one
+        count = self.count
+        if not count:
+            return None
+        n = len(self.channels)
+        slot = (count - 1) % self.depth
+        return self.stamps[slot], tuple(self.values[slot * n:(slot + 1) * n].tolist())
+
+    def level_stats(self, channels=None, since=None):
+        # LevelStats over the stored frames, for all or a subset of the channels
+        channels = self.channels if channels is None else tuple(channels)
+        idx = [self._index[ch] for ch in channels]
+        stats = LevelStats(channels)
+        for _, values in self.frames(since):
+            stats.add([values[i] for i in idx])
+        return stats
+
+    def close(self):
+        self.stamps.release()
+        self.values.release()
+        self._view.release()
+        if isinstance(self._buf, mmap.mmap):
+            if not self._buf.closed:
+                if self._file is not None:
+                    self._buf.flush()
+                self._buf.close()
+        if self._file is not None:
+            self._file.close()
@@ -0,0 +1,79 @@
+import struct
+from operator import itemgetter
+
+# X32 meter packets: padded OSC address, ",b" type tag, big-endian blob size,
+# then a little-endian value count followed by little-endian float32 values.
+# /formatsubscribe blobs may carry the values without the count word.
+SIZE_STRUCT = struct.Struct('>I')
+COUNT_STRUCT = struct.Struct('<I')
+_float_structs = {}
+
+
+def float_struct(count):
+    s = _float_structs.get(count)
+    if s is None:
+        s = _float_structs[count] = struct.Struct(f'<{count}f')
+    return s
+
+
+def blob_offset(data):
+    # Offset of the blob size field: skip the null-padded address and ",b\0\0"
+    end = data.index(b'\0')
+    return (end // 4 + 1) * 4 + 4
+
+
+def is_blob(data):
+    # Meter pushes are the only blob replies the X32 sends
+    try:
+        offset = blob_offset(data)
+    except ValueError:
+        return False
+    return data[offset - 4:offset - 2] == b',b'
+
+
+def blob_values(data):
+    # (offset of the first float, number of floats)
+    offset = blob_offset(data)
+    size = SIZE_STRUCT.unpack_from(data, offset)[0]
+    count = COUNT_STRUCT.unpack_from(data, offset + 4)[0]
+    if 4 * count + 4 == size:
+        return offset + 8, count
+    return offset + 4, size // 4
+
+
+def parse_x32_meter_blob(data):
+    start, num_values = blob_values(data)
+    values = float_struct(num_values).unpack_from(data, start)
+    return [round(v, 10) for v in values]
+
+
+class MeterDecoder:
+    # Decodes only the configured channels straight out of the UDP payload.
+    # Values come back as a tuple in the order of self.channels. base is the
+    # channel of the payload's first value: 1 for the full /meters/1 bank, the
+    # first subscribed channel for a narrowed /formatsubscribe.
+    def __init__(self, channels, base=1):
+        self.channels = tuple(sorted(int(ch) for ch in channels))
+        self.base = base
+        if not self.channels:
+            self.first = 0
+            self._window = float_struct(0)
+            self._pick = lambda window: ()
+            return
+        self.first = self.channels[0] - base
+        self._window = float_struct(self.channels[-1] - base + 1 - self.first)
+        idx = [ch - base - self.first for ch in self.channels]
+        if len(idx) == 1:
+            self._pick = lambda window, i=idx[0]: (window[i],)
+        else:
+            self._pick = itemgetter(*idx)
+
+    def decode(self, data):
+        start, num_values = blob_values(data)
+        base = self.base
+        if self.channels and num_values <= self.channels[-1] - base:
+            values = float_struct(num_values).unpack_from(data, start)
+            return tuple(round(values[ch - base], 10) if ch - base < num_values else 0.0
+                         for ch in self.channels)
+        window = self._window.unpack_from(data, start + 4 * self.first)
+        return tuple([round(v, 10) for v in self._pick(window)])
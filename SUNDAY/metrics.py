@@ -0,0 +1,116 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Upper bounds in seconds, Prometheus-style; the last bucket is +Inf
+BUCKETS = (25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 1.0)
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'sum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS, self.counts):
+            seen += n
+            if n and seen >= rank:
+                return bound
+        return float('inf') if self.counts[-1] else 0.0
+
+
+class Metrics:
+    # Stage timings and counters. Nothing here runs unless Console.instrument
+    # wraps its methods with timed(), so a disabled build pays nothing. Updates
+    # happen without a lock: a lost increment is fine for a dashboard. Every
+    # stage and counter is created up front, since the HTTP thread iterates them.
+    def __init__(self):
+        self.stages = {}
+        self.counters = {}
+        self._last_log = (time.monotonic(), 0)
+
+    def histogram(self, stage):
+        h = self.stages.get(stage)
+        if h is None:
+            h = self.stages[stage] = Histogram()
+        return h
+
+    def inc(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def timed(self, stage, fn):
+        h = self.histogram(stage)
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return fn(*args)
+            finally:
+                h.observe(clock() - start)
+        return wrapper
+
+    def prometheus(self):
+        lines = ["# TYPE sunday_stage_seconds histogram"]
+        for stage, h in sorted(self.stages.items()):
+            cumulative = 0
+            for bound, n in zip(BUCKETS + (float('inf'),), h.counts):
+                cumulative += n
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'sunday_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'sunday_stage_seconds_sum{{stage="{stage}"}} {h.sum}')
+            lines.append(f'sunday_stage_seconds_count{{stage="{stage}"}} {h.count}')
+        for name, value in sorted(self.counters.items()):
+            lines.append(f"# TYPE sunday_{name}_total counter")
+            lines.append(f"sunday_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def log_line(self):
+        # Datagram rate since the previous line; quantiles since startup
+        now = time.monotonic()
+        then, previous = self._last_log
+        datagrams = self.counters.get("datagrams", 0)
+        self._last_log = (now, datagrams)
+        parts = [
+            f"{(datagrams - previous) / max(now - then, 1e-9):.0f} datagrams/s",
+            f"{self.counters.get('dropped', 0)} dropped",
+            f"{self.counters.get('oversized', 0)} oversized",
+        ]
+        parts += [f"{stage} p50 {h.quantile(0.5) * 1e6:.0f}us p99 {h.quantile(0.99) * 1e6:.0f}us"
+                  for stage, h in sorted(self.stages.items()) if h.count]
+        return "[Metrics] " + ", ".join(parts)
+
+    def serve(self, port, host="127.0.0.1"):
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"[Metrics] Serving http://{host}:{port}/metrics")
+        return server
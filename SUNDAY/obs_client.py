@@ -0,0 +1,77 @@
+import threading
+from obswebsocket import obsws, requests
+
+try:
+    from obswebsocket import events
+except ImportError:
+    events = None
+
+
+class ObsStreamWatcher:
+    # Keeps one OBS websocket connection open and reports stream on/off through
+    # on_change(streaming). StreamStateChanged events drive updates; without
+    # them GetStreamStatus is polled every poll_interval. With events a status
+    # call every heartbeat seconds doubles as the liveness check. A lost or
+    # failed connection reports None (unknown), never False, and retries with
+    # exponential backoff; only OBS itself can say the stream is off.
+    def __init__(self, host, port, password, on_change, poll_interval=1.0, heartbeat=10.0,
+                 max_backoff=30.0, timeout=5.0, client_factory=obsws):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self.heartbeat = heartbeat
+        self.max_backoff = max_backoff
+        self.timeout = timeout  # per websocket call; obsws waits 60s by default
+        self.client_factory = client_factory
+        self.streaming = None
+        self._wake = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="obs-watcher", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wake.set()
+
+    def _report(self, streaming):
+        streaming = None if streaming is None else bool(streaming)
+        if streaming != self.streaming:
+            self.streaming = streaming
+            self.on_change(streaming)
+
+    def _on_stream_state(self, event):
+        self._report(event.datain.get("outputActive", False))
+
+    def _run(self):
+        backoff = 1.0
+        while not self._stopped.is_set():
+            ws = self.client_factory(self.host, self.port, self.password, timeout=self.timeout)
+            try:
+                ws.connect()
+                has_events = events is not None and hasattr(events, "StreamStateChanged")
+                if has_events:
+                    ws.register(self._on_stream_state, events.StreamStateChanged)
+                print(f"[OBS] Connected ({'events' if has_events else 'polling'})")
+                backoff = 1.0
+                while not self._stopped.is_set():
+                    response = ws.call(requests.GetStreamStatus())
+                    self._report(response.datain.get("outputActive", False))
+                    self._wake.wait(self.heartbeat if has_events else self.poll_interval)
+                    self._wake.clear()
+            except Exception as e:
+                print(f"[ERROR] OBS connection lost: {e} (retry in {backoff:.0f}s)")
+                self._report(None)
+                self._wake.wait(backoff)
+                self._wake.clear()
+                backoff = min(backoff * 2, self.max_backoff)
+            finally:
+                try:
+                    ws.disconnect()
+                except Exception:
+                    pass
@@ -0,0 +1,116 @@
+import asyncio
+import queue
+import socket
+import threading
+
+
+class X32Protocol(asyncio.DatagramProtocol):
+    def __init__(self, on_datagram):
+        self.on_datagram = on_datagram
+
+    def datagram_received(self, data, addr):
+        self.on_datagram(data)
+
+    def error_received(self, exc):
+        print(f"[OSC] Socket error: {exc}")
+
+
+class OscEngine:
+    # One asyncio loop on one thread owns the X32 socket and every periodic
+    # job. Other threads reach it through call()/submit(); it reaches the UI,
+    # if one set `wake`, through the `events` queue, calling wake() after each post.
+    def __init__(self, local_port, on_datagram, wake=None):
+        self.local_port = local_port
+        self.on_datagram = on_datagram
+        self.wake = wake
+        self.loop = asyncio.new_event_loop()
+        self.transport = None
+        self.events = queue.SimpleQueue()
+        self._tasks = set()
+        self._thread = None
+
+    # --- Any thread ---
+    def start(self, main):
+        def run():
+            asyncio.set_event_loop(self.loop)
+            self.spawn(main())
+            self.loop.run_forever()
+            self.loop.close()
+
+        self._thread = threading.Thread(target=run, name="osc-engine", daemon=True)
+        self._thread.start()
+
+    def call(self, fn, *args):
+        self.loop.call_soon_threadsafe(fn, *args)
+
+    def in_loop(self):
+        return threading.current_thread() is self._thread
+
+    def submit(self, coro):
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def post(self, *event):
+        # Without a UI to wake nobody drains the queue, so don't fill it
+        if self.wake is None:
+            return
+        self.events.put(event)
+        self.wake()
+
+    def stop(self, timeout=2.0):
+        if self._thread is None or not self._thread.is_alive():
+            return
+        try:
+            self.submit(self._shutdown()).result(timeout)
+        except Exception as e:
+            print(f"[Engine] Unclean shutdown: {e!r}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+
+    # --- Loop thread ---
+    def spawn(self, coro):
+        task = self.loop.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._task_done)
+        return task
+
+    def every(self, interval, fn, *args):
+        async def repeat():
+            while True:
+                await asyncio.sleep(interval)
+                # One failed tick (e.g. a send while the NIC is down) mustn't end the job
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"[Engine] {getattr(fn, '__name__', fn)} failed: {e!r}")
+        return self.spawn(repeat())
+
+    async def open(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind(('', self.local_port))
+        except OSError:
+            sock.close()
+            raise
+        self.transport, _ = await self.loop.create_datagram_endpoint(
+            lambda: X32Protocol(self.on_datagram), sock=sock
+        )
+        return self.transport
+
+    def close_transport(self):
+        if self.transport is not None:
+            self.transport.close()
+            self.transport = None
+
+    def _task_done(self, task):
+        self._tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[Engine] Task failed: {task.exception()!r}")
+
+    async def _shutdown(self):
+        current = asyncio.current_task()
+        tasks = [t for t in self._tasks if t is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.close_transport()
@@ -0,0 +1,77 @@
+import asyncio
+import os
+import struct
+import time
+
+# Append-only capture of console traffic. The file starts with MAGIC, then
+# holds records of <uint64 monotonic ns><uint16 length><datagram>. A record
+# with length 0 marks a new recording session, whose clock restarts.
+MAGIC = b"SUNDAYOSC1\n"
+RECORD = struct.Struct('<QH')
+
+
+class OscRecorder:
+    def __init__(self, path):
+        self.path = path
+        new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'ab')
+        if new:
+            self._file.write(MAGIC)
+        self._file.write(RECORD.pack(time.monotonic_ns(), 0))
+        self.count = 0
+
+    def record(self, data):
+        # Engine thread; buffered, flush() runs on a timer
+        self._file.write(RECORD.pack(time.monotonic_ns(), len(data)))
+        self._file.write(data)
+        self.count += 1
+
+    def flush(self):
+        if not self._file.closed:
+            self._file.flush()
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+            print(f"[Record] {self.count} datagrams written to {self.path}")
+
+
+def read_log(path):
+    # Yields (seconds into the recording, datagram); sessions are laid end to end
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not an OSC recording")
+        start = None
+        offset = elapsed = 0.0
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            stamp, length = RECORD.unpack(header)
+            if not length:
+                start, offset = stamp, elapsed
+                continue
+            data = f.read(length)
+            if len(data) < length:
+                return  # truncated by a crash mid-write
+            if start is None:
+                start = stamp
+            elapsed = offset + (stamp - start) / 1e9
+            yield elapsed, data
+
+
+async def replay(path, feed, speed=1.0):
+    # Calls feed(stamp, datagram) for each record with the original pacing
+    # scaled by speed; speed 0 replays as fast as possible. Returns (count, seconds).
+    began = time.perf_counter()
+    count = 0
+    for stamp, data in read_log(path):
+        if speed:
+            delay = stamp / speed - (time.perf_counter() - began)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % 1000 == 0:
+            await asyncio.sleep(0)
+        feed(stamp, data)
+        count += 1
+    return count, time.perf_counter() - began
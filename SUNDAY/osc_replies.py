@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class PendingQuery:
+    __slots__ = ('future', 'dgram', 'deadline', 'retries_left')
+
+    def __init__(self, dgram, deadline, retries):
+        self.future = Future()
+        self.dgram = dgram
+        self.deadline = deadline
+        self.retries_left = retries
+
+
+class ReplyDispatcher:
+    # Matches replies arriving on the shared OSC socket to outstanding queries
+    # by address. Unanswered queries are re-sent `retries` times, then their
+    # future fails with TimeoutError. One sweeper thread handles all deadlines.
+    def __init__(self, send, timeout=0.5, retries=2):
+        self.send = send
+        self.timeout = timeout
+        self.retries = retries
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._sweeper = None
+
+    def query(self, address, dgram):
+        with self._cond:
+            pending = self._pending.get(address)
+            if pending is not None:
+                return pending.future
+            pending = self._pending[address] = PendingQuery(dgram, time.monotonic() + self.timeout, self.retries)
+            if self._sweeper is None:
+                self._sweeper = threading.Thread(target=self._sweep, daemon=True)
+                self._sweeper.start()
+            self._cond.notify()
+        self._send(dgram)
+        return pending.future
+
+    def resolve(self, address, params):
+        with self._cond:
+            pending = self._pending.pop(address, None)
+        if pending is None:
+            return False
+        pending.future.set_result(params)
+        return True
+
+    def _send(self, dgram):
+        try:
+            self.send(dgram)
+        except OSError as e:
+            print(f"[OSC] Query send failed: {e}")
+
+    def _sweep(self):
+        while True:
+            resend = []
+            expired = []
+            with self._cond:
+                now = time.monotonic()
+                for address, pending in list(self._pending.items()):
+                    if pending.deadline > now:
+                        continue
+                    if pending.retries_left > 0:
+                        pending.retries_left -= 1
+                        pending.deadline = now + self.timeout
+                        resend.append(pending.dgram)
+                    else:
+                        del self._pending[address]
+                        expired.append((address, pending.future))
+                if not resend and not expired:
+                    deadline = min((p.deadline for p in self._pending.values()), default=None)
+                    self._cond.wait(None if deadline is None else deadline - now)
+                    continue
+            for dgram in resend:
+                self._send(dgram)
+            for address, future in expired:
+                future.set_exception(TimeoutError(f"No reply for {address}"))
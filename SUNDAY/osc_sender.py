@@ -0,0 +1,90 @@
+import socket
+import struct
+import threading
+from contextlib import contextmanager
+from pythonosc.osc_message_builder import OscMessageBuilder
+
+BUNDLE_HEADER = b'#bundle\0' + struct.pack('>Q', 1)  # timetag 1 = immediately
+MAX_BUNDLE_SIZE = 1400  # stay under a typical Ethernet MTU
+MAX_CACHED_MESSAGES = 256
+INT_STRUCT = struct.Struct('>i')
+
+
+def build_message(address, types='', args=()):
+    builder = OscMessageBuilder(address=address)
+    for t, a in zip(types, args):
+        builder.add_arg(a, t)
+    return builder.build().dgram
+
+
+class OscSender:
+    # One long-lived UDP socket plus prebuilt datagrams for everything we send
+    # to the console. With coalesce=True, writes made inside batch() go out as
+    # OSC bundles instead of one datagram each.
+    def __init__(self, host, port, coalesce=False):
+        self.target = (host, port)
+        self.coalesce = coalesce
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._lock = threading.Lock()
+        self._pending = None
+        self._messages = {}
+        self._int_prefixes = {}
+
+    def send(self, dgram, sock=None):
+        if sock is None:
+            with self._lock:
+                if self._pending is not None:
+                    self._pending.append(dgram)
+                    return
+            sock = self.sock
+        sock.sendto(dgram, self.target)
+
+    def message(self, address, types='', args=()):
+        key = (address, types, tuple(args))
+        dgram = self._messages.get(key)
+        if dgram is None:
+            if len(self._messages) >= MAX_CACHED_MESSAGES:
+                self._messages.clear()
+            dgram = self._messages[key] = build_message(address, types, args)
+        return dgram
+
+    def int_message(self, address, value):
+        # Address and ",i" tag are encoded once per address; only the argument varies
+        prefix = self._int_prefixes.get(address)
+        if prefix is None:
+            prefix = self._int_prefixes[address] = build_message(address, 'i', [0])[:-4]
+        return prefix + INT_STRUCT.pack(value)
+
+    def scribble_color(self, ch, color_id):
+        return self.int_message(f"/ch/{ch:02}/config/color", color_id)
+
+    @contextmanager
+    def batch(self):
+        if not self.coalesce:
+            yield
+            return
+        with self._lock:
+            self._pending = []
+        try:
+            yield
+        finally:
+            with self._lock:
+                pending, self._pending = self._pending, None
+            self._flush(pending)
+
+    def _flush(self, dgrams):
+        if len(dgrams) == 1:
+            self.sock.sendto(dgrams[0], self.target)
+            return
+        bundle = BUNDLE_HEADER
+        for dgram in dgrams:
+            element = INT_STRUCT.pack(len(dgram)) + dgram
+            if len(bundle) + len(element) > MAX_BUNDLE_SIZE and len(bundle) > len(BUNDLE_HEADER):
+                self.sock.sendto(bundle, self.target)
+                bundle = BUNDLE_HEADER
+            bundle += element
+        if len(bundle) > len(BUNDLE_HEADER):
+            self.sock.sendto(bundle, self.target)
+
+    def close(self):
+        self.sock.close()
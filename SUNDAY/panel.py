@@ -0,0 +1,192 @@
+import queue
+import threading
+import time
+import tkinter as tk
+from tkinter import messagebox
+from PIL import ImageTk
+from screeninfo import get_monitors
+from image_cache import load_scaled_images, scaled_image
+import updater
+
+
+class Panel:
+    # The Tk indicator wall. It subscribes to a Console's engine events and
+    # only ever draws; all console traffic stays on the engine thread.
+    def __init__(self, console, config):
+        self.console = console
+        self.fullscreen = config["FULLSCREEN_MODE"]
+        display_index = config["DISPLAY_INDEX"]
+        status = console.status
+
+        try:
+            monitor = get_monitors()[display_index]
+        except IndexError:
+            monitor = get_monitors()[0]
+            status += "+MN"
+        monitor_x, monitor_y, monitor_width, monitor_height = monitor.x, monitor.y, monitor.width, monitor.height
+
+        self.root = root = tk.Tk()
+        root.attributes("-topmost", True)
+        root.overrideredirect(True)
+
+        if self.fullscreen:
+            image_width = monitor_width // 3
+            image_height = monitor_height // 3
+            root.geometry(f"{monitor_width}x{monitor_height}+{monitor_x}+{monitor_y}")
+            status += "+FS"
+        else:
+            image_width = monitor_width // 8
+            image_height = monitor_width // 16
+            root.geometry(f"{monitor_width}x{image_height}+{monitor_x}+{monitor_y}")
+
+        root.configure(bg='black')
+
+        suffix = " FS.png" if self.fullscreen else ".png"
+        scaled = load_scaled_images(
+            [(f"{i}{kind}{suffix}", image_width, image_height) for i in range(1, 9) for kind in ("I", "O")]
+        )
+        self.images = [
+            {'on': self.to_photo(scaled[2 * i]), 'off': self.to_photo(scaled[2 * i + 1])} for i in range(8)
+        ]
+        self.labels = [tk.Label(root, bg='black') for _ in range(8)]
+
+        if self.fullscreen:
+            positions = [
+                (0, 0),                    # 1 - Top left
+                (0, image_height),         # 2 - Middle left
+                (0, 2 * image_height),     # 3 - Bottom left
+                (image_width, 2 * image_height),  # 4 - Bottom center
+                (image_width, 0),          # 5 - Top center
+                (2 * image_width, 0),      # 6 - Top right
+                (2 * image_width, image_height),  # 7 - Middle right
+                (2 * image_width, 2 * image_height)  # 8 - Bottom right
+            ]
+            for i in range(8):
+                self.labels[i].place(x=positions[i][0], y=positions[i][1], width=image_width, height=image_height)
+
+            # --- Center Cell (Status + Logo) ---
+            center_x = image_width
+            center_y = image_height
+            self.status_var = tk.StringVar(value=status.upper())
+            status_label = tk.Label(
+                root, textvariable=self.status_var, font=("Helvetica", 36, "bold"),
+                fg="white", bg="black"
+            )
+            status_label.place(x=center_x, y=center_y + 10, width=image_width, height=50)
+
+            max_logo_width = image_width - 40
+            max_logo_height = image_height - 90  # leave space for status above
+            logo_img = ImageTk.PhotoImage(scaled_image("logo.png", max_logo_width, max_logo_height, fit=True))
+            logo_label = tk.Label(root, image=logo_img, bg='black')
+            logo_label.image = logo_img
+            logo_label.place(
+                x=center_x + (image_width - logo_img.width()) // 2,
+                y=center_y + 70,
+                width=logo_img.width(),
+                height=logo_img.height()
+            )
+        else:
+            for i in range(8):
+                self.labels[i].place(x=(i * image_width), y=0, width=image_width, height=image_height)
+
+        # Image key each label currently shows ('' = blank, None = never drawn)
+        self.rendered_frames = [None] * 8
+        self.rendered_version = None
+        self.ui_ready = False
+        self.ui_wake_pending = False
+        if console.metrics is not None:
+            self.render = console.metrics.timed("render", self.render)
+        console.engine.wake = self.wake_ui
+
+    @staticmethod
+    def to_photo(img):
+        return ImageTk.PhotoImage(img) if img is not None else None
+
+    def run(self):
+        self.root.bind("<<EngineEvent>>", self.update_display)
+        self.root.after(0, self.update_display)
+        if not self.console.replay_path:
+            updater.check_in_background(lambda info: self.console.engine.post("update", info))
+        self.root.mainloop()
+
+    def shutdown(self):
+        self.console.stop()
+        self.root.destroy()
+
+    def wake_ui(self):
+        # Engine thread: one pending <<EngineEvent>> at a time; update_display drains everything
+        if self.ui_ready and not self.ui_wake_pending:
+            self.ui_wake_pending = True
+            try:
+                self.root.event_generate("<<EngineEvent>>", when="tail")
+            except (RuntimeError, tk.TclError):
+                self.ui_wake_pending = False
+
+    # --- Display Update (Tk thread) ---
+    def update_display(self, event=None):
+        self.ui_ready = True
+        self.ui_wake_pending = False  # before draining, so a post during the drain wakes us again
+        try:
+            while True:
+                event = self.console.engine.events.get_nowait()
+                if event[0] == "status" and self.fullscreen:
+                    self.status_var.set(event[1].upper())
+                elif event[0] == "update":
+                    self.prompt_for_update(event[1])
+                elif event[0] == "restart":
+                    self.shutdown()
+                    updater.restart()
+        except queue.Empty:
+            pass
+
+        # "frame" events only wake us; the newest snapshot is what gets drawn
+        snapshot = self.console.store.current
+        if snapshot.version != self.rendered_version:
+            self.rendered_version = snapshot.version
+            metrics = self.console.metrics
+            if metrics is not None and snapshot.version:
+                metrics.histogram("frame_delivery").observe(time.perf_counter() - snapshot.published_at)
+            self.render(snapshot)
+
+    def render(self, snapshot):
+        # Flash schedule for this tick; DCA6 muted holds flashing panels steady
+        dca_override = snapshot.dca_override
+        schedule = {
+            'on': 'on',
+            'off': 'off',
+            'flashon': 'on' if snapshot.flashon or dca_override else 'off',
+            'flashoff': 'off' if snapshot.flashoff or dca_override else '',
+        }
+        for i, state in enumerate(snapshot.states):
+            frame = schedule.get(state, '')
+            if frame == self.rendered_frames[i]:
+                continue
+            self.rendered_frames[i] = frame
+            img = self.images[i][frame] if frame else None
+            self.labels[i].config(image=img if img else '')
+            self.labels[i].image = img
+
+    # --- Updates (Tk thread) ---
+    def prompt_for_update(self, info):
+        version = info.get("latest_version")
+        decision = messagebox.askyesnocancel(
+            "Update Available",
+            f"Version {version} is available.\n\n{info.get('notes', '')}\n\nInstall now?",
+            parent=self.root
+        )
+        if decision is True:
+            threading.Thread(target=self.install_update, args=(info,), daemon=True).start()
+        elif decision is False:
+            updater.save_version_data(version=version, skip=True)
+        else:
+            print("🔁 Update postponed until next launch.")
+
+    def install_update(self, info):
+        try:
+            applied = updater.install_update(info)
+        except Exception as e:
+            print(f"[Update] Failed: {e}")
+            return
+        if applied:
+            updater.save_version_data(version=info.get("latest_version"))
+            self.console.engine.post("restart")
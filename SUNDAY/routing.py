@@ -0,0 +1,60 @@
+MAX_CHANNEL = 32
+MAX_DCA = 8
+# Groups whose indicator is on when any member is unmuted (default: all members)
+ANY_ON_GROUPS = ('Handheld',)
+
+
+class Indicator:
+    # A mute/level source for a panel or scribble: a group or a single mic
+    __slots__ = ('name', 'channels', 'any_on', 'on', 'low')
+
+    def __init__(self, name, channels, any_on=False):
+        self.name = name
+        self.channels = tuple(channels)
+        self.any_on = any_on
+        self.on = True
+        self.low = False
+
+
+class Routing:
+    # Config compiled once at load into channel/DCA-number indexed arrays and
+    # prebound Indicator objects, so the per-packet paths never format keys.
+    def __init__(self, thresholds, group_channels, individual_channels, dcas):
+        size = max([MAX_CHANNEL, *thresholds, *individual_channels, *sum(group_channels.values(), [])]) + 1
+        self.ch_low = [False] * size
+        self.ch_muted = [True] * size
+        self.dca_muted = [True] * (max([MAX_DCA, *dcas]) + 1)
+
+        # Same order as MeterDecoder(thresholds).channels
+        self.channels = tuple(sorted(thresholds))
+        self.level_routes = tuple((ch, thresholds[ch]) for ch in self.channels)
+
+        self.groups = {
+            name: Indicator(name, chans, any_on=name in ANY_ON_GROUPS)
+            for name, chans in group_channels.items()
+        }
+        self.individuals = {ch: Indicator(f"mic{ch}", (ch,)) for ch in individual_channels}
+        self.indicators = tuple(self.groups.values()) + tuple(self.individuals.values())
+        self.dcas = tuple(dcas)
+        self.polled_channels = tuple(dict.fromkeys([*individual_channels, *sum(group_channels.values(), [])]))
+
+        # Scribble strip channel -> the indicator that decides its flash phase
+        scribble_routes = []
+        for ch in self.channels:
+            indicator = self.individuals.get(ch)
+            if indicator is None:
+                indicator = next((g for g in self.groups.values() if ch in g.channels), None)
+            if indicator is not None:
+                scribble_routes.append((ch, indicator))
+        self.scribble_routes = tuple(scribble_routes)
+
+        # Reverse map: reply address -> (state array, index)
+        self.mute_addresses = {f"/ch/{ch:02}/mix/on": (self.ch_muted, ch) for ch in range(1, size)}
+        self.mute_addresses.update({f"/dca/{dca}/on": (self.dca_muted, dca) for dca in range(1, len(self.dca_muted))})
+
+    def group(self, name):
+        # Unconfigured groups get a detached indicator that stays on and not low
+        return self.groups.get(name) or Indicator(name, ())
+
+    def individual(self, ch):
+        return self.individuals.get(ch) or Indicator(f"mic{ch}", ())
@@ -0,0 +1,22 @@
+import time
+from collections import namedtuple
+
+# What the panel shows, as one immutable value. The engine thread is the only
+# writer and swaps in a whole new Snapshot; any other thread reads
+# StateStore.current, a single reference read, and never sees a half-applied
+# update. version increases by one per published change.
+Snapshot = namedtuple('Snapshot', 'version states flashon flashoff dca_override published_at')
+
+
+class StateStore:
+    def __init__(self, states):
+        self.current = Snapshot(0, tuple(states), True, True, False, time.perf_counter())
+
+    def publish(self, states, flashon, flashoff, dca_override):
+        # Returns the new snapshot, or None when it would draw the same as the last
+        current = self.current
+        if (states, flashon, flashoff, dca_override) == current[1:5]:
+            return None
+        snapshot = Snapshot(current.version + 1, states, flashon, flashoff, dca_override, time.perf_counter())
+        self.current = snapshot
+        return snapshot
@@ -0,0 +1,267 @@
+import json
+import urllib.error
+import urllib.parse
+import urllib.request
+import os
+import zipfile
+import shutil
+import sys
+import threading
+import hashlib
+from app_paths import cache_dir
+
+VERSION_FILE = "version.json"
+UPDATE_INFO_URL = "https://raw.githubusercontent.com/dspillmangj/SUNDAY/main/latest.json"
+UPDATE_DIR = "update_temp"
+UPDATE_TIMEOUT = 3  # seconds; the booth network is often offline
+INFO_CACHE_FILE = os.path.join(cache_dir(), "latest.json")
+
+# Load local version info
+if os.path.exists(VERSION_FILE):
+    with open(VERSION_FILE, "r") as f:
+        local_version_data = json.load(f)
+else:
+    local_version_data = {"current_version": "0.0.0", "skipped_versions": []}
+
+CURRENT_VERSION = local_version_data["current_version"]
+SKIPPED_VERSIONS = set(local_version_data.get("skipped_versions", []))
+
+
+def load_cached_info():
+    try:
+        with open(INFO_CACHE_FILE, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cached_info(info, etag, last_modified):
+    try:
+        os.makedirs(os.path.dirname(INFO_CACHE_FILE), exist_ok=True)
+        with open(INFO_CACHE_FILE, "w") as f:
+            json.dump({"etag": etag, "last_modified": last_modified, "info": info}, f, indent=2)
+    except OSError as e:
+        print(f"[Update Check] Could not cache update info: {e}")
+
+
+# Fetch remote update info, revalidating the cached copy with ETag/Last-Modified
+def fetch_update_info(timeout=UPDATE_TIMEOUT):
+    cached = load_cached_info()
+    request = urllib.request.Request(UPDATE_INFO_URL)
+    if cached:
+        if cached.get("etag"):
+            request.add_header("If-None-Match", cached["etag"])
+        if cached.get("last_modified"):
+            request.add_header("If-Modified-Since", cached["last_modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            info = json.load(response)
+            save_cached_info(info, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+            return info
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return cached["info"]
+        print(f"[Update Check] Failed: {e}")
+        return None
+    except Exception as e:
+        print(f"[Update Check] Failed: {e}")
+        return None
+
+
+def version_newer(remote, local):
+    return tuple(map(int, remote.split("."))) > tuple(map(int, local.split(".")))
+
+
+def update_offer(info):
+    # The update worth prompting for, or None
+    latest_version = info.get("latest_version") if info else None
+    if latest_version and version_newer(latest_version, CURRENT_VERSION) and latest_version not in SKIPPED_VERSIONS:
+        return info
+    return None
+
+
+def check_in_background(on_update):
+    # on_update(info) is called on the worker thread only when an update is offered
+    def run():
+        info = update_offer(fetch_update_info())
+        if info:
+            on_update(info)
+    threading.Thread(target=run, name="update-check", daemon=True).start()
+
+
+DOWNLOAD_CHUNK = 1 << 20
+DOWNLOAD_TIMEOUT = 30  # per socket operation, not for the whole transfer
+
+
+def download(url, dest, timeout=DOWNLOAD_TIMEOUT):
+    # Streams url into dest and returns the SHA-256 of the complete file.
+    # An existing partial dest is resumed with an HTTP Range request.
+    sha256 = hashlib.sha256()
+    offset = 0
+    if os.path.exists(dest):
+        with open(dest, 'rb') as f:
+            for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b''):
+                sha256.update(chunk)
+                offset += len(chunk)
+
+    request = urllib.request.Request(url)
+    if offset:
+        request.add_header("Range", f"bytes={offset}-")
+    try:
+        response = urllib.request.urlopen(request, timeout=timeout)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and offset:
+            return sha256.hexdigest()  # already have every byte
+        raise
+    with response:
+        if offset and response.status != 206:
+            print("[Update] Server ignored resume request, downloading from the start")
+            sha256 = hashlib.sha256()
+            offset = 0
+        elif offset:
+            print(f"[Update] Resuming download at {offset} bytes")
+        with open(dest, 'ab' if offset else 'wb') as f:
+            for chunk in iter(lambda: response.read(DOWNLOAD_CHUNK), b''):
+                sha256.update(chunk)
+                f.write(chunk)
+    return sha256.hexdigest()
+
+
+def file_sha256(path):
+    if not os.path.isfile(path):
+        return None
+    sha256 = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(DOWNLOAD_CHUNK), b''):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def swap_in(staged, target, items=None):
+    # Moves staged entries (every top-level entry, or the given relative file
+    # paths) over their live counterparts. Live entries are renamed aside
+    # first and put back if any move fails.
+    previous = os.path.join(UPDATE_DIR, "previous")
+    shutil.rmtree(previous, ignore_errors=True)
+    os.makedirs(previous)
+    moved = []
+    try:
+        for item in (os.listdir(staged) if items is None else items):
+            live = os.path.join(target, item)
+            backup = os.path.join(previous, item)
+            if os.path.lexists(live):
+                os.makedirs(os.path.dirname(backup), exist_ok=True)
+                os.replace(live, backup)
+            moved.append((live, backup))
+            os.makedirs(os.path.dirname(live), exist_ok=True)
+            os.replace(os.path.join(staged, item), live)
+    except OSError:
+        for live, backup in reversed(moved):
+            if os.path.lexists(backup):
+                if os.path.isdir(live):
+                    shutil.rmtree(live, ignore_errors=True)
+                os.replace(backup, live)
+        raise
+
+
+def download_and_extract_update(url, expected_hash):
+    if not expected_hash:
+        print("❌ No SHA-256 published for this update. Update aborted.")
+        return False
+    os.makedirs(UPDATE_DIR, exist_ok=True)
+    # Partial downloads are named after the release hash so only the same build is resumed
+    zip_name = f"update-{expected_hash[:16]}.zip.part"
+    for name in os.listdir(UPDATE_DIR):
+        if name.endswith(".zip.part") and name != zip_name:
+            os.remove(os.path.join(UPDATE_DIR, name))
+    zip_path = os.path.join(UPDATE_DIR, zip_name)
+
+    if download(url, zip_path) != expected_hash:
+        print("❌ SHA-256 hash mismatch! Update aborted.")
+        os.remove(zip_path)
+        return False
+
+    staging = os.path.join(UPDATE_DIR, "staging")
+    shutil.rmtree(staging, ignore_errors=True)
+    with zipfile.ZipFile(zip_path, 'r') as zip_ref:
+        zip_ref.extractall(staging)
+
+    # The archive holds a single top-level app folder
+    extracted_folder = next(
+        (os.path.join(staging, d) for d in os.listdir(staging) if os.path.isdir(os.path.join(staging, d))),
+        None
+    )
+    if extracted_folder:
+        swap_in(extracted_folder, os.getcwd())
+
+    shutil.rmtree(UPDATE_DIR)
+    print("✅ Update applied.")
+    return True
+
+
+def apply_delta_update(info):
+    # Fetches only the files whose hash differs from the manifest published
+    # next to latest.json. Returns False when the delta can't be used.
+    manifest_url = info.get("manifest_url")
+    if not manifest_url or not info.get("manifest_sha256"):
+        return False
+    os.makedirs(UPDATE_DIR, exist_ok=True)
+    manifest_path = os.path.join(UPDATE_DIR, "manifest.json")
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+    if download(manifest_url, manifest_path) != info["manifest_sha256"]:
+        print("❌ Manifest hash mismatch.")
+        return False
+    with open(manifest_path, "r") as f:
+        manifest = json.load(f)
+
+    target = os.getcwd()
+    changed = []
+    for relpath, entry in manifest["files"].items():
+        local = os.path.normpath(relpath)
+        if os.path.isabs(local) or local.startswith(".."):
+            print(f"❌ Refusing manifest path {relpath}")
+            return False
+        if file_sha256(os.path.join(target, local)) != entry["sha256"]:
+            changed.append((relpath, local, entry["sha256"]))
+    print(f"[Update] {len(changed)} of {len(manifest['files'])} files changed")
+
+    staging = os.path.join(UPDATE_DIR, "delta")
+    for relpath, local, expected in changed:
+        dest = os.path.join(staging, local)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        url = urllib.parse.urljoin(manifest["base_url"], urllib.parse.quote(relpath))
+        if download(url, dest) != expected:
+            print(f"❌ SHA-256 mismatch for {relpath}.")
+            os.remove(dest)
+            return False
+
+    swap_in(staging, target, [local for _, local, _ in changed])
+    shutil.rmtree(UPDATE_DIR)
+    print("✅ Update applied.")
+    return True
+
+
+def install_update(info):
+    # Delta first; any failure falls back to the full archive
+    try:
+        if apply_delta_update(info):
+            return True
+    except Exception as e:
+        print(f"[Update] Delta update failed: {e}")
+    return download_and_extract_update(info.get("download_url"), info.get("sha256"))
+
+
+def restart():
+    print("Restarting...")
+    os.execv(sys.executable, ['python'] + sys.argv)
+
+
+def save_version_data(version=None, skip=False):
+    if skip:
+        SKIPPED_VERSIONS.add(version)
+    elif version:
+        local_version_data["current_version"] = version
+    local_version_data["skipped_versions"] = list(SKIPPED_VERSIONS)
+    with open(VERSION_FILE, "w") as f:
+        json.dump(local_version_data, f, indent=2)
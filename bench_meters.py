@@ -0,0 +1,57 @@
+import os
+import random
+import struct
+import sys
+import timeit
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "SUNDAY"))
+from meters import MeterDecoder, parse_x32_meter_blob
+
+# --- Configuration ---
+SUBSCRIPTION_NAME = "mtrs"
+NUM_VALUES = 96  # /meters/1: 32 inputs, 32 gate, 32 dynamics
+CHANNELS = range(3, 17)
+NUMBER = 20000
+
+
+# Decoder as it shipped before meters.py, kept here as the baseline
+def legacy_parse_x32_meter_blob(data):
+    header_length = 12
+    blob = data[header_length:]
+    num_values = struct.unpack('<I', blob[4:8])[0]
+    float_data = blob[8:]
+    values = struct.unpack('<' + 'f' * num_values, float_data[:num_values * 4])
+    return [float(Decimal(str(v)).quantize(Decimal('0.0000000001'))) for v in values]
+
+
+def build_packet(num_values):
+    address = f"/{SUBSCRIPTION_NAME}".encode()
+    address += b'\0' * (4 - len(address) % 4)
+    values = [random.uniform(0.0, 0.0001) for _ in range(num_values)]
+    blob = struct.pack('<I', num_values) + struct.pack(f'<{num_values}f', *values)
+    return address + b',b\0\0' + struct.pack('>I', len(blob)) + blob
+
+
+def main():
+    data = build_packet(NUM_VALUES)
+    decoder = MeterDecoder(CHANNELS)
+
+    legacy = legacy_parse_x32_meter_blob(data)
+    assert list(decoder.decode(data)) == [legacy[ch - 1] for ch in decoder.channels]
+    assert parse_x32_meter_blob(data) == legacy
+
+    cases = [
+        ("legacy Decimal quantize", lambda: legacy_parse_x32_meter_blob(data)),
+        ("parse_x32_meter_blob (all values)", lambda: parse_x32_meter_blob(data)),
+        (f"MeterDecoder ({len(decoder.channels)} channels)", lambda: decoder.decode(data)),
+    ]
+    baseline = None
+    for name, fn in cases:
+        per_call = min(timeit.repeat(fn, number=NUMBER, repeat=5)) / NUMBER
+        baseline = baseline or per_call
+        print(f"{name:<36} {per_call * 1e6:8.2f} us/packet  x{baseline / per_call:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,136 @@
 import os
 import shutil
+import struct
 import zipfile
+import zlib
 import hashlib
 import json
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 # --- Configuration ---
 APP_FOLDER = "SUNDAY"
 OUTPUT_ZIP = "SUNDAY_Update.zip"
 LATEST_JSON = "latest.json"
+MANIFEST_JSON = "manifest.json"
 VERSION = "1.2.2"
 NOTES = "🎉 Added update check, version control, and hash validation."
 DOWNLOAD_URL = "https://github.com/dspillmangj/SUNDAY/releases/latest/download/SUNDAY_Update.zip"
+MANIFEST_URL = "https://raw.githubusercontent.com/dspillmangj/SUNDAY/main/manifest.json"
+FILES_BASE_URL = "https://raw.githubusercontent.com/dspillmangj/SUNDAY/main/SUNDAY/"
 PUSH_TO_GITHUB = True  # Set to False if you don't want it to auto-push
+BUILD_CACHE = ".publish_cache"  # compressed members reused between builds
+SKIP_NAMES = {"__pycache__", "update_temp", ".DS_Store"}
+STORED_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".zip"}  # already compressed
+COMPRESS_LEVEL = 9
+
+# Fixed zip metadata so identical content always produces an identical archive
+ZIP_DOS_TIME = 0
+ZIP_DOS_DATE = (1 << 5) | 1  # 1980-01-01
+ZIP_EXTERNAL_ATTR = 0o100644 << 16
+LOCAL_HEADER = struct.Struct('<4s5H3L2H')
+CENTRAL_HEADER = struct.Struct('<4s6H3L5H2L')
+END_RECORD = struct.Struct('<4s4H2LH')
+
+def iter_app_files(source_dir):
+    # (path on disk, path relative to source_dir with '/' separators), sorted
+    for root, dirs, files in os.walk(source_dir):
+        dirs[:] = sorted(d for d in dirs if d not in SKIP_NAMES)
+        for file in sorted(files):
+            if file in SKIP_NAMES:
+                continue
+            filepath = os.path.join(root, file)
+            yield filepath, os.path.relpath(filepath, start=source_dir).replace(os.sep, "/")
+
+def read_cached(cached, data, crc):
+    # Payload from the cache, or None if it's missing or doesn't inflate back to data
+    try:
+        with open(cached, 'rb') as f:
+            payload = f.read()
+        inflater = zlib.decompressobj(-15)
+        restored = inflater.decompress(payload) + inflater.flush()
+    except (OSError, zlib.error):
+        return None
+    if not inflater.eof or len(restored) != len(data) or zlib.crc32(restored) != crc:
+        return None
+    return payload
+
+def compress_member(filepath):
+    # -> (crc, method, uncompressed size, payload, cache entry name or None).
+    # Deflate output is cached by content hash, so unchanged files are reused.
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    crc = zlib.crc32(data)
+    if os.path.splitext(filepath)[1].lower() in STORED_EXTENSIONS:
+        return crc, zipfile.ZIP_STORED, len(data), data, None
+
+    cache_name = f"{hashlib.sha256(data).hexdigest()}.{COMPRESS_LEVEL}.deflate"
+    cached = os.path.join(BUILD_CACHE, cache_name)
+    payload = read_cached(cached, data, crc)
+    if payload is not None:
+        return crc, zipfile.ZIP_DEFLATED, len(data), payload, cache_name
+    compressor = zlib.compressobj(COMPRESS_LEVEL, zlib.DEFLATED, -15)
+    payload = compressor.compress(data) + compressor.flush()
+    if len(payload) >= len(data):
+        return crc, zipfile.ZIP_STORED, len(data), data, None
+    # Written under a per-thread name and renamed, so an interrupted build or a
+    # second thread compressing identical content never sees a partial entry
+    tmp_cached = f"{cached}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_cached, 'wb') as f:
+        f.write(payload)
+    os.replace(tmp_cached, cached)
+    return crc, zipfile.ZIP_DEFLATED, len(data), payload, cache_name
 
 # --- Step 1: Zip the project ---
 def zip_app(source_dir, zip_filename):
-    if os.path.exists(zip_filename):
-        os.remove(zip_filename)
-    with zipfile.ZipFile(zip_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(source_dir):
-            for file in files:
-                filepath = os.path.join(root, file)
-                arcname = os.path.relpath(filepath, start=source_dir)
-                zipf.write(filepath, os.path.join(os.path.basename(source_dir), arcname))
+    # Written by hand rather than with zipfile.ZipFile so members can be
+    # compressed in parallel and reused from BUILD_CACHE.
+    os.makedirs(BUILD_CACHE, exist_ok=True)
+    entries = [
+        (filepath, f"{os.path.basename(source_dir)}/{relpath}")
+        for filepath, relpath in iter_app_files(source_dir)
+    ]
+    with ThreadPoolExecutor() as pool:
+        members = list(pool.map(compress_member, [filepath for filepath, _ in entries]))
+
+    tmp_filename = zip_filename + ".tmp"
+    central = []
+    with open(tmp_filename, 'wb') as zipf:
+        for (_, arcname), (crc, method, size, payload, _) in zip(entries, members):
+            name = arcname.encode('utf-8')
+            flags = 0 if name.isascii() else 0x800
+            offset = zipf.tell()
+            zipf.write(LOCAL_HEADER.pack(
+                b'PK\x03\x04', 20, flags, method, ZIP_DOS_TIME, ZIP_DOS_DATE,
+                crc, len(payload), size, len(name), 0
+            ))
+            zipf.write(name)
+            zipf.write(payload)
+            central.append(CENTRAL_HEADER.pack(
+                b'PK\x01\x02', 20, 20, flags, method, ZIP_DOS_TIME, ZIP_DOS_DATE,
+                crc, len(payload), size, len(name), 0, 0, 0, 0, ZIP_EXTERNAL_ATTR, offset
+            ) + name)
+        central_offset = zipf.tell()
+        for record in central:
+            zipf.write(record)
+        zipf.write(END_RECORD.pack(
+            b'PK\x05\x06', 0, 0, len(central), len(central),
+            zipf.tell() - central_offset, central_offset, 0
+        ))
+    os.replace(tmp_filename, zip_filename)
+
+    with zipfile.ZipFile(zip_filename) as zipf:
+        bad = zipf.testzip()
+        if bad:
+            raise RuntimeError(f"Archive check failed at {bad}")
+
+    # Drop cached members no longer part of the app
+    used = {member[4] for member in members}
+    for name in os.listdir(BUILD_CACHE):
+        if name not in used:
+            os.remove(os.path.join(BUILD_CACHE, name))
 
 # --- Step 2: Compute SHA-256 ---
 def compute_sha256(filepath):
@@ -34,19 +140,36 @@ def compute_sha256(filepath):
             sha256.update(chunk)
     return sha256.hexdigest()
 
-# --- Step 3: Update latest.json ---
-def update_latest_json(version, url, hash_value, notes):
+# --- Step 3: Per-file manifest for delta updates ---
+def write_manifest(source_dir, version):
+    manifest = {
+        "version": version,
+        "base_url": FILES_BASE_URL,
+        "files": {
+            relpath: {"sha256": compute_sha256(filepath), "size": os.path.getsize(filepath)}
+            for filepath, relpath in iter_app_files(source_dir)
+        }
+    }
+    with open(MANIFEST_JSON, 'w') as f:
+        json.dump(manifest, f, indent=4, sort_keys=True)
+    print(f"✅ {MANIFEST_JSON} written ({len(manifest['files'])} files)")
+    return compute_sha256(MANIFEST_JSON)
+
+# --- Step 4: Update latest.json ---
+def update_latest_json(version, url, hash_value, notes, manifest_hash):
     latest = {
         "latest_version": version,
         "download_url": url,
         "sha256": hash_value,
+        "manifest_url": MANIFEST_URL,
+        "manifest_sha256": manifest_hash,
         "notes": notes
     }
     with open(LATEST_JSON, 'w') as f:
         json.dump(latest, f, indent=4)
     print(f"✅ {LATEST_JSON} updated")
 
-# --- Step 4 (Optional): GitHub Commit & Push ---
+# --- Step 5 (Optional): GitHub Commit & Push ---
 def git_commit_and_push():
     subprocess.run(["git", "add", "."], check=True)
     subprocess.run(["git", "commit", "-m", f"Release v{VERSION} - {datetime.now().isoformat()}"], check=True)
@@ -61,8 +184,11 @@ def main():
     print("🔐 Computing SHA-256...")
     hash_value = compute_sha256(OUTPUT_ZIP)
 
+    print("🧾 Writing file manifest...")
+    manifest_hash = write_manifest(APP_FOLDER, VERSION)
+
     print("📝 Updating latest.json...")
-    update_latest_json(VERSION, DOWNLOAD_URL, hash_value, NOTES)
+    update_latest_json(VERSION, DOWNLOAD_URL, hash_value, NOTES, manifest_hash)
 
     if PUSH_TO_GITHUB:
         print("📤 Committing and pushing to GitHub...")
@@ -0,0 +1,227 @@
+import argparse
+import os
+import random
+import re
+import socket
+import struct
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "SUNDAY"))
+from osc_sender import build_message
+from pythonosc.osc_packet import OscPacket, ParseError
+
+# --- Configuration ---
+DEFAULT_PORT = 10023
+NUM_VALUES = 96  # /meters/1: 32 inputs, 32 gate, 32 dynamics
+BASE_INTERVAL = 0.05  # meter push interval at time factor 0
+SUBSCRIPTION_TTL = 10  # seconds a subscription or /xremote lasts without /renew
+NOISE_LEVEL = 0.001  # level of a live mic; dead ones read 0.0
+DEFAULT_COLOR = 3
+PHANTOM_CHANNELS = {37: 7}  # headamp -> input channel; SUNDAY probes 037 at startup
+
+CH_ON = re.compile(r"^/ch/(\d\d)/mix/on$")
+CH_COLOR = re.compile(r"^/ch/(\d\d)/config/color$")
+DCA_ON = re.compile(r"^/dca/(\d)/on$")
+PHANTOM = re.compile(r"^/headamp/(\d\d\d)/phantom$")
+
+
+class Subscription:
+    __slots__ = ('name', 'first', 'last', 'interval', 'compact', 'expires', 'due')
+
+    def __init__(self, name, first, last, interval, compact):
+        self.name = name
+        self.first = first
+        self.last = last
+        self.interval = interval
+        self.compact = compact
+        self.expires = time.monotonic() + SUBSCRIPTION_TTL
+        self.due = time.monotonic()
+
+
+class Console:
+    # Enough X32 state for SUNDAY: mutes, DCAs, scribble colors, phantom power
+    # and meter subscriptions. A channel reads 0.0 when it is listed in dead
+    # or its headamp has phantom power off.
+    def __init__(self, sock, values=NUM_VALUES, rate=None):
+        self.sock = sock
+        self.values = values
+        self.rate = rate
+        self.mix_on = {ch: 1 for ch in range(1, 33)}
+        self.dca_on = {dca: 1 for dca in range(1, 9)}
+        self.colors = {ch: DEFAULT_COLOR for ch in range(1, 33)}
+        self.phantom = {headamp: 1 for headamp in PHANTOM_CHANNELS}
+        self.dead = set()
+        self.subscriptions = {}
+        self.xremote = {}
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.received = 0
+        self.toggled_at = {}
+        self.latencies = []
+
+    def interval(self, factor):
+        return 1.0 / self.rate if self.rate else BASE_INTERVAL * (factor + 1)
+
+    def reply(self, addr, address, types='', args=()):
+        self.sock.sendto(build_message(address, types, args), addr)
+
+    def push(self, address, types, args):
+        now = time.monotonic()
+        for addr, expires in list(self.xremote.items()):
+            if expires > now:
+                self.reply(addr, address, types, args)
+
+    def handle(self, address, params, addr):
+        with self.lock:
+            self.received += 1
+            if address == '/batchsubscribe':
+                name, _, _, _, factor = params
+                self.subscriptions[addr] = Subscription(name, 1, self.values, self.interval(factor), False)
+            elif address == '/formatsubscribe':
+                name, _, first, last, factor = params
+                self.subscriptions[addr] = Subscription(name, first, last, self.interval(factor), True)
+            elif address == '/renew':
+                sub = self.subscriptions.get(addr)
+                if sub is not None:
+                    sub.expires = time.monotonic() + SUBSCRIPTION_TTL
+                if addr in self.xremote:
+                    self.xremote[addr] = time.monotonic() + SUBSCRIPTION_TTL
+            elif address == '/xremote':
+                self.xremote[addr] = time.monotonic() + SUBSCRIPTION_TTL
+            elif CH_ON.match(address):
+                self.int_node(address, params, addr, self.mix_on, int(CH_ON.match(address).group(1)))
+            elif DCA_ON.match(address):
+                self.int_node(address, params, addr, self.dca_on, int(DCA_ON.match(address).group(1)))
+            elif CH_COLOR.match(address):
+                ch = int(CH_COLOR.match(address).group(1))
+                if params and ch in self.toggled_at:
+                    self.latencies.append(time.monotonic() - self.toggled_at.pop(ch))
+                self.int_node(address, params, addr, self.colors, ch)
+            elif PHANTOM.match(address):
+                self.int_node(address, params, addr, self.phantom, int(PHANTOM.match(address).group(1)))
+
+    def int_node(self, address, params, addr, table, key):
+        if params:
+            table[key] = int(params[0])
+            self.push(address, 'i', [table[key]])
+        else:
+            self.reply(addr, address, 'i', [table.get(key, 0)])
+
+    def level(self, ch):
+        if ch in self.dead:
+            return 0.0
+        for headamp, phantom_ch in PHANTOM_CHANNELS.items():
+            if phantom_ch == ch and not self.phantom.get(headamp, 1):
+                return 0.0
+        return NOISE_LEVEL * random.uniform(0.9, 1.1)
+
+    def meter_packet(self, sub):
+        levels = [self.level(ch) for ch in range(sub.first, sub.last + 1)]
+        floats = struct.pack(f'<{len(levels)}f', *levels)
+        blob = floats if sub.compact else struct.pack('<I', len(levels)) + floats
+        address = ('/' + sub.name).encode()
+        address += b'\0' * (4 - len(address) % 4)
+        return address + b',b\0\0' + struct.pack('>I', len(blob)) + blob
+
+    def send_meters(self):
+        # Returns seconds until the next subscription is due
+        now = time.monotonic()
+        wait = BASE_INTERVAL
+        with self.lock:
+            for addr, sub in list(self.subscriptions.items()):
+                if sub.expires <= now:
+                    del self.subscriptions[addr]
+                    continue
+                if sub.due <= now:
+                    self.sock.sendto(self.meter_packet(sub), addr)
+                    self.sent += 1
+                    sub.due = max(sub.due + sub.interval, now - sub.interval)
+                wait = min(wait, sub.due - now)
+        return max(wait, 0.0)
+
+    def toggle(self, ch):
+        # Latency is timed from a channel going dead to SUNDAY's first scribble
+        # write for it; a live channel gets no color writes to confuse it with
+        with self.lock:
+            if ch in self.dead:
+                self.dead.discard(ch)
+                self.toggled_at.pop(ch, None)
+            else:
+                self.dead.add(ch)
+                self.toggled_at[ch] = time.monotonic()
+
+
+def receive_loop(console):
+    while True:
+        data, addr = console.sock.recvfrom(4096)
+        try:
+            packet = OscPacket(data)
+        except ParseError:
+            continue
+        for timed in packet.messages:
+            console.handle(timed.message.address, timed.message.params, addr)
+
+
+def meter_loop(console):
+    while True:
+        time.sleep(console.send_meters())
+
+
+def toggle_loop(console, ch, period):
+    while True:
+        time.sleep(period)
+        console.toggle(ch)
+
+
+def report(console, interval):
+    last_sent = last_received = 0
+    while True:
+        time.sleep(interval)
+        with console.lock:
+            sent, received = console.sent, console.received
+            latencies, console.latencies = sorted(console.latencies), []
+            subscribers = len(console.subscriptions)
+        line = (f"[Sim] {subscribers} subscribers, meters {(sent - last_sent) / interval:.0f}/s, "
+                f"received {(received - last_received) / interval:.0f}/s")
+        if latencies:
+            p50 = latencies[len(latencies) // 2]
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            line += (f", toggle->color latency p50 {p50 * 1000:.1f} ms p95 {p95 * 1000:.1f} ms "
+                     f"max {latencies[-1] * 1000:.1f} ms (n={len(latencies)})")
+        print(line, flush=True)
+        last_sent, last_received = sent, received
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal X32 stand-in for testing SUNDAY without a console")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rate", type=float, help="meter packets/s per subscriber, overriding the time factor")
+    parser.add_argument("--values", type=int, default=NUM_VALUES, help="floats per /batchsubscribe meter blob")
+    parser.add_argument("--dead", type=int, nargs="*", default=[], help="channels that read 0.0")
+    parser.add_argument("--toggle", type=int, metavar="CH", help="flip CH between live and dead to measure latency")
+    parser.add_argument("--period", type=float, default=2.0, help="seconds between --toggle flips")
+    parser.add_argument("--report", type=float, default=5.0, help="seconds between stats lines")
+    args = parser.parse_args()
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+    sock.bind((args.host, args.port))
+    console = Console(sock, values=args.values, rate=args.rate)
+    console.dead.update(args.dead)
+    print(f"[Sim] Listening on {args.host}:{args.port}")
+
+    threading.Thread(target=meter_loop, args=(console,), daemon=True).start()
+    threading.Thread(target=report, args=(console, args.report), daemon=True).start()
+    if args.toggle:
+        threading.Thread(target=toggle_loop, args=(console, args.toggle, args.period), daemon=True).start()
+    try:
+        receive_loop(console)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()